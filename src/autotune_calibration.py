@@ -19,24 +19,35 @@ autotune_calibration.py  ——  可替换版本（含停止条件 + 快速仿
       "MCIV": 1322905.0
     }
 可通过 --target-json 指定；否则使用下面 DEFAULT_TARGET 作为兜底。
+
+搜索策略：默认用贝叶斯优化（GP 代理 + EI 采集，需 pip install scikit-optimize）提议候选；
+未安装 scikit-optimize 或 --search random 时，退回到围绕当前最优的随机扰动。
+可选：安装 orjson 后目标/统计/结果 JSON 的读写走 orjson，缺失时使用标准库 json。
 """
 
 from __future__ import annotations
 import argparse
+import calendar
 import contextlib
-import io
+import hashlib
 import json
 import math
+import mmap
+import multiprocessing as mp
 import os
 import random
 import re
 import signal
 import sys
 import time
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from dataclasses import dataclass, asdict
 from datetime import datetime
 from typing import Dict, Any, Optional, Tuple
 
+import numpy as np
+
 # ==== 你工程里的主仿真入口 ====
 # 需要 main.py 里提供：run_simulation(sim_out_file, dataset_type, sim_duration_minutes, device_count, scene_params)
 try:
@@ -45,6 +56,42 @@ except Exception as e:
     print("导入 main.py 失败，请确认该文件与本脚本在同一工程内。错误：", repr(e))
     raise
 
+# scikit-optimize 为可选依赖：缺失时 search="bo" 自动退回随机扰动
+try:
+    from skopt import Optimizer
+    from skopt.acquisition import gaussian_ei
+except Exception:
+    Optimizer = None
+
+# orjson 为可选依赖：可用时用它解析/序列化 JSON，否则退回标准库 json
+try:
+    import orjson
+except Exception:
+    orjson = None
+
+# hyperscan 为可选依赖：用作“直接统计行”的 DFA 预筛，缺失时退回子串查找
+try:
+    import hyperscan
+except Exception:
+    hyperscan = None
+
+def _loads(b):
+    """解析 JSON（bytes 或 str）。"""
+    return orjson.loads(b) if orjson is not None else json.loads(b)
+
+def _dumps(obj) -> str:
+    """序列化为带缩进的 JSON 文本，非 ASCII 字符原样保留。"""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS
+                            | orjson.OPT_SERIALIZE_NUMPY).decode("utf-8")
+    return json.dumps(obj, ensure_ascii=False, indent=2)
+
+def _dumps_line(obj) -> bytes:
+    """序列化为单行 UTF-8 JSON（含换行符），用于 JSONL 流式记录。"""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY) + b"\n"
+    return (json.dumps(obj, ensure_ascii=False) + "\n").encode("utf-8")
+
 # ------------ 配置与默认值 ------------
 # 若未提供目标 JSON，这组会作为默认“真实指标”
 DEFAULT_TARGET = {
@@ -57,6 +104,18 @@ DEFAULT_TARGET = {
 SCALE_BETWEEN_RANGE = (0.30, 2.50)
 SPREAD_BETWEEN_RANGE = (0.05, 1.50)
 BURST_GAMMA_RANGE   = (0.01, 0.60)
+# 贝叶斯优化的搜索空间（顺序即候选向量 x 的顺序）
+SEARCH_SPACE = [SCALE_BETWEEN_RANGE, SPREAD_BETWEEN_RANGE, BURST_GAMMA_RANGE]
+# GP 拟合前的随机探索点数（含初始点）；skopt 默认 10 会在默认 patience 内耗尽早停预算
+BO_INITIAL_POINTS = 4
+# 信息量早停：在域内随机采样点上的最大 EI 低于该值，说明再评估也难有改进
+EI_EPS = 1e-4
+EI_SAMPLES = 2000
+# 连续 patience 轮最优分数的相对改进低于该比例即早停
+REL_IMPROVE_EPS = 0.01
+# 仿真失败的候选按惩罚分数告知优化器（至少该值，且不低于已见最差分数的 2 倍），
+# 否则下一轮 ask() 会原样重提同一点，白白耗掉 patience
+FAILED_SCORE_FLOOR = 10.0
 
 # 权重（可按需要微调）
 W_MCR  = 0.5
@@ -70,6 +129,41 @@ THRESH = {
     "MCIV": 0.35,   # 35%
 }
 
+# stdout/日志解析用的正则（模块加载时预编译，整段文本一次扫描）
+# 均为 bytes 模式：直接在 mmap 的 UTF-8 日志字节上匹配，无需先解码成 str
+# 例如：MCR=..., NUMR=..., MCIV=...
+_RE_DIRECT = re.compile(rb"MCR\s*=\s*([0-9.]+).+?NUMR\s*=\s*([0-9.]+).+?MCIV\s*=\s*([0-9.]+)", re.S)
+_RE_TOTAL_MACS = re.compile(rb"Total number of different MAC.*?:\s*([0-9]+)")
+_RE_TOTAL_PKTS = re.compile(rb"Total number of packets.*?:\s*([0-9]+)")
+# 形如：[2025-09-15 07:52:50.737935] 设备 0 发送数据包（成功）。
+_RE_TS_SEND = re.compile(rb"\[(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}\.\d+)\][^\n]*"
+                         + "发送数据包（成功".encode("utf-8"))
+_RE_MAC_CHANGE = re.compile(rb"MAC[^\n]*(" + "变更|更换|随机".encode("utf-8") + rb"|rotation|changed)", re.I)
+
+# _RE_DIRECT 的 .+? 在 re.S 下会回溯；日志里通常没有这行，先确认三个键都出现过再跑它
+_DIRECT_KEYS = (rb"MCR\s*=\s*[0-9.]", rb"NUMR\s*=\s*[0-9.]", rb"MCIV\s*=\s*[0-9.]")
+_HS_DIRECT_DB = None
+if hyperscan is not None:
+    try:
+        _HS_DIRECT_DB = hyperscan.Database()
+        _HS_DIRECT_DB.compile(expressions=list(_DIRECT_KEYS), ids=[0, 1, 2],
+                              flags=[hyperscan.HS_FLAG_SINGLEMATCH] * len(_DIRECT_KEYS))
+    except Exception:
+        _HS_DIRECT_DB = None
+
+def _may_have_direct(buf) -> bool:
+    """预筛：三个键是否都出现过（必要条件，命中后仍由 _RE_DIRECT 负责提取）。"""
+    if _HS_DIRECT_DB is not None:
+        seen = set()
+        def on_match(id_, start, end, flags, context):
+            seen.add(id_)
+        try:
+            _HS_DIRECT_DB.scan(buf, match_event_handler=on_match)
+            return len(seen) == len(_DIRECT_KEYS)
+        except Exception:
+            pass
+    return all(buf.find(k) != -1 for k in (b"MCR", b"NUMR", b"MCIV"))
+
 @dataclass
 class SceneParams:
     # 与 main.run_simulation 的 scene_params 对齐（不要求完全匹配，冗余键不会出错）
@@ -118,46 +212,97 @@ def _unique_run_tag(prefix: str) -> str:
     ts = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
     return f"{prefix}_{ts}"
 
-def _capture_stdout(func, *args, **kwargs) -> Tuple[str, Any]:
-    """捕获函数执行期间的 stdout，返回(文本, 函数返回值)。"""
-    buf = io.StringIO()
-    rv = None
+def _capture_stdout(log_path: str, func, *args, **kwargs) -> Any:
+    """
+    把函数执行期间的 stdout 直接写进 log_path（UTF-8），返回函数返回值。
+    日志不在内存里攒：POSIX 下 sys.stdout 即 fd 1 时用 os.dup2 重定向 fd；
+    否则（Windows 控制台、被替换的 sys.stdout 等）退回 redirect_stdout 到同一文件。
+    """
+    try:
+        use_fd = os.name == "posix" and sys.stdout.fileno() == 1
+    except (AttributeError, OSError, ValueError):
+        use_fd = False
+    if not use_fd:
+        with open(log_path, "w", encoding="utf-8") as log_f, contextlib.redirect_stdout(log_f):
+            return func(*args, **kwargs)
+
+    sys.stdout.flush()
+    old_encoding = sys.stdout.encoding
+    saved_fd = os.dup(1)
     try:
-        with contextlib.redirect_stdout(buf):
-            rv = func(*args, **kwargs)
+        with open(log_path, "wb") as log_f:
+            os.dup2(log_f.fileno(), 1)
+            sys.stdout.reconfigure(encoding="utf-8")
+            try:
+                return func(*args, **kwargs)
+            finally:
+                sys.stdout.flush()
+                sys.stdout.reconfigure(encoding=old_encoding)
+                os.dup2(saved_fd, 1)
     finally:
-        out = buf.getvalue()
-    return out, rv
+        os.close(saved_fd)
 
 def _try_read_json(path: str) -> Optional[Dict[str, Any]]:
+    # EAFP：直接 open，文件不存在时由异常兜底，省掉一次 exists 的 stat
     try:
-        if os.path.exists(path):
-            with open(path, "r", encoding="utf-8") as f:
-                return json.load(f)
-    except Exception:
-        pass
-    return None
+        with open(path, "rb") as f:
+            return _loads(f.read())
+    except (OSError, ValueError):  # ValueError 含 JSONDecodeError / 编码错误
+        return None
 
-def _try_read_text(path: str) -> Optional[str]:
-    try:
-        if os.path.exists(path):
-            with open(path, "r", encoding="utf-8", errors="ignore") as f:
-                return f.read()
-    except Exception:
-        pass
-    return None
+# 日期 b"YYYY-mm-dd" -> 当日 0 点的 epoch 秒；一次运行只会出现少数几个日期
+_DAY_EPOCH: Dict[bytes, int] = {}
 
-def _parse_metrics_from_stdout(stdout_str: str) -> Dict[str, float]:
+def _fast_ts(s: bytes) -> float:
+    """
+    把固定格式的 b"YYYY-mm-dd HH:MM:SS.ffffff" 直接按整数切片解析成秒，替代 strptime。
+    按 UTC 计算：这里的时间戳只用于求间隔/时长，与本地时区无关。
+    """
+    day = s[:10]
+    base = _DAY_EPOCH.get(day)
+    if base is None:
+        base = calendar.timegm((int(s[0:4]), int(s[5:7]), int(s[8:10]), 0, 0, 0, 0, 0, 0))
+        _DAY_EPOCH[day] = base
+    frac = s[20:]
+    return base + int(s[11:13]) * 3600 + int(s[14:16]) * 60 + int(s[17:19]) + int(frac) / 10 ** len(frac)
+
+# 解析结果按内容哈希做进程内 LRU；小于阈值的输出直接解析（哈希开销反而更大）
+_PARSE_CACHE: "OrderedDict[bytes, Dict[str, float]]" = OrderedDict()
+_PARSE_CACHE_MAX = 64
+_PARSE_CACHE_MIN_BYTES = 4096
+
+def _parse_metrics_from_stdout(stdout_buf) -> Dict[str, float]:
     """
     兜底：从仿真 stdout 中尽力提取/估算 MCR、NUMR、MCIV。
+    stdout_buf 可以是 bytes / mmap（UTF-8 日志字节），也兼容 str。
+    同一份较大的输出重复解析时直接命中缓存。
+    """
+    if isinstance(stdout_buf, str):
+        stdout_buf = stdout_buf.encode("utf-8")
+    if len(stdout_buf) < _PARSE_CACHE_MIN_BYTES:
+        return _scan_metrics(stdout_buf)
+
+    key = hashlib.blake2b(stdout_buf, digest_size=16).digest()
+    hit = _PARSE_CACHE.get(key)
+    if hit is not None:
+        _PARSE_CACHE.move_to_end(key)
+        return dict(hit)
+    m = _scan_metrics(stdout_buf)
+    _PARSE_CACHE[key] = dict(m)
+    if len(_PARSE_CACHE) > _PARSE_CACHE_MAX:
+        _PARSE_CACHE.popitem(last=False)
+    return m
+
+def _scan_metrics(stdout_buf) -> Dict[str, float]:
+    """
+    _parse_metrics_from_stdout 的实际扫描（bytes / mmap）：
     - 优先找带关键字的统计行；
     - 否则用时间戳行估算（近似，保证调参过程可进行且有可比性）。
     """
     m = {"MCR": 0.0, "NUMR": 0.0, "MCIV": 0.0}
 
     # 1) 直接统计行（如果 main 打印了）
-    # 例如：MCR=..., NUMR=..., MCIV=...
-    direct = re.search(r"MCR\s*=\s*([0-9.]+).+?NUMR\s*=\s*([0-9.]+).+?MCIV\s*=\s*([0-9.]+)", stdout_str, re.S)
+    direct = _RE_DIRECT.search(stdout_buf) if _may_have_direct(stdout_buf) else None
     if direct:
         try:
             m["MCR"]  = float(direct.group(1))
@@ -169,8 +314,8 @@ def _parse_metrics_from_stdout(stdout_str: str) -> Dict[str, float]:
 
     # 2) NUMR 估算：若日志里包含 “Total number of different MAC:” 与 “Total number of packets:”
     # 有些实现会把这两行打到 stdout（更多时候写文件，文件解析在下面）
-    macs = re.search(r"Total number of different MAC.*?:\s*([0-9]+)", stdout_str)
-    pkts = re.search(r"Total number of packets.*?:\s*([0-9]+)", stdout_str)
+    macs = _RE_TOTAL_MACS.search(stdout_buf)
+    pkts = _RE_TOTAL_PKTS.search(stdout_buf)
     if macs and pkts:
         try:
             unique_mac = float(macs.group(1))
@@ -181,38 +326,49 @@ def _parse_metrics_from_stdout(stdout_str: str) -> Dict[str, float]:
             pass
 
     # 3) 利用“发送成功”行的时间戳估算 MCIV（仅作为近似兜底）
-    # 形如：[2025-09-15 07:52:50.737935] 设备 0 发送数据包（成功）。
-    ts = []
-    for line in stdout_str.splitlines():
-        # 提取 [YYYY-mm-dd HH:MM:SS.micro] 这样的时间戳
-        mo = re.search(r"\[(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}\.\d+)\].*发送数据包（成功", line)
-        if mo:
-            try:
-                dt = datetime.strptime(mo.group(1), "%Y-%m-%d %H:%M:%S.%f").timestamp()
-                ts.append(dt)
-            except Exception:
-                pass
-    if len(ts) >= 3:
-        intervals = [ts[i+1] - ts[i] for i in range(len(ts)-1)]
-        if intervals:
-            mean = sum(intervals) / len(intervals)
-            var  = sum((x - mean) ** 2 for x in intervals) / len(intervals)
-            # 这里把“发送间隔方差”当作 MCIV 的兜底近似
-            m["MCIV"] = var
+    # 整段文本一次 finditer，不再逐行 splitlines + re.search
+    # 边扫描边用 Welford 在线算法累计间隔的均值/方差，不保留时间戳列表
+    n, mean, M2 = 0, 0.0, 0.0
+    prev = t_min = t_max = None
+    for mo in _RE_TS_SEND.finditer(stdout_buf):
+        t = _fast_ts(mo.group(1))
+        if prev is None:
+            t_min = t_max = t
+        else:
+            delta = t - prev
+            n += 1
+            d = delta - mean
+            mean += d / n
+            M2 += d * (delta - mean)
+            if t < t_min:
+                t_min = t
+            elif t > t_max:
+                t_max = t
+        prev = t
+    if n >= 2:
+        # 这里把“发送间隔方差”当作 MCIV 的兜底近似
+        m["MCIV"] = M2 / n
 
     # 4) MCR 兜底估算：若日志中能识别到 “MAC 变更/更换/随机化”等事件，则据此统计；否则按 0 处理
-    mac_change = 0
-    for line in stdout_str.splitlines():
-        if re.search(r"MAC.*(变更|更换|随机|rotation|changed)", line, re.I):
-            mac_change += 1
-    if mac_change and ts:
-        # 每秒变化次数 ≈ 变化次数 / 总时长（用首次与末次发送时间估算）
-        dur = max(ts) - min(ts)
-        if dur > 0:
-            m["MCR"] = mac_change / dur
+    # 模式不跨行，每个命中行恰好对应一次匹配；没有发送时间戳时无需统计
+    if prev is not None:
+        mac_change = sum(1 for _ in _RE_MAC_CHANGE.finditer(stdout_buf))
+        if mac_change:
+            # 每秒变化次数 ≈ 变化次数 / 总时长（用首次与末次发送时间估算）
+            dur = t_max - t_min
+            if dur > 0:
+                m["MCR"] = mac_change / dur
 
     return m
 
+def _parse_metrics_from_log(path: str) -> Optional[Dict[str, float]]:
+    """mmap 日志文件，直接在字节上跑 _parse_metrics_from_stdout；文件不存在或为空时返回 None。"""
+    try:
+        with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            return _parse_metrics_from_stdout(mm)
+    except (OSError, ValueError):  # ValueError：空文件无法 mmap
+        return None
+
 def _parse_metrics_from_files(base_out: str) -> Optional[Dict[str, float]]:
     """
     从文件解析指标。支持多种可能的导出：
@@ -220,7 +376,7 @@ def _parse_metrics_from_files(base_out: str) -> Optional[Dict[str, float]]:
       - {base}.txt（若包含统计行）
       - {base}_packets.csv / {base}_devices.csv（可扩展：此处演示对 .txt 的解析，csv 如需更精确可按列解析）
     """
-    # 1) stats.json
+    # 1) stats.json（命中即返回，不再探测文本日志）
     j = _try_read_json(f"{base_out}_stats.json")
     if j and all(k in j for k in ("MCR", "NUMR", "MCIV")):
         # 允许键名大小写不敏感
@@ -231,12 +387,10 @@ def _parse_metrics_from_files(base_out: str) -> Optional[Dict[str, float]]:
         }
 
     # 2) 主文本日志
-    txt = _try_read_text(f"{base_out}.txt") or _try_read_text(base_out)
-    if txt:
-        out = _parse_metrics_from_stdout(txt)
-        # 只要至少有一项非零，就认为取到了有效估计
-        if any(out.values()):
-            return out
+    out = _parse_metrics_from_log(f"{base_out}.txt") or _parse_metrics_from_log(base_out)
+    # 只要至少有一项非零，就认为取到了有效估计
+    if out and any(out.values()):
+        return out
 
     # 3) 设备/分包 CSV —— 这里按需扩展；先返回 None 表示没取到
     return None
@@ -247,10 +401,10 @@ def run_one_simulation(sim_out_base: str,
                        scene: SceneParams,
                        device_count: int = 1) -> Tuple[Dict[str, float], str]:
     """
-    运行一次仿真并解析三指标。返回 (metrics, raw_stdout)。
+    运行一次仿真并解析三指标。返回 (metrics, stdout 日志路径)。
 
     说明：
-      - 默认捕获 stdout，以便我们兜底解析；
+      - stdout 直接写入 {sim_out_base}.stdout.log（不占内存），以便我们兜底解析；
       - 同时尝试从 {sim_out_base}_stats.json / {sim_out_base}.txt 读取更“官方”的统计；
       - 若两者都没有，就用 stdout 近似（保证调参流程可继续进行）。
     """
@@ -265,7 +419,9 @@ def run_one_simulation(sim_out_base: str,
     scene_params = {k: v for k, v in scene_params.items() if v is not None}
 
     # 真正调用主仿真
-    stdout_text, _ = _capture_stdout(
+    log_path = f"{sim_out_base}.stdout.log"
+    _capture_stdout(
+        log_path,
         main.run_simulation,
         sim_out_base,                 # 注意：你的 main 里可能会自己加扩展名
         dataset_type,
@@ -280,14 +436,14 @@ def run_one_simulation(sim_out_base: str,
         metrics = file_metrics
     else:
         # 回退到 stdout 提取（近似）
-        metrics = _parse_metrics_from_stdout(stdout_text)
+        metrics = _parse_metrics_from_log(log_path) or {}
 
     # 最终仍保证返回三项键
     metrics.setdefault("MCR",  0.0)
     metrics.setdefault("NUMR", 0.0)
     metrics.setdefault("MCIV", 0.0)
 
-    return metrics, stdout_text
+    return metrics, log_path
 
 
 # ------------------ 自动调参主循环 ------------------
@@ -314,6 +470,113 @@ def random_params_around(center: SceneParams, step_scale=0.25) -> SceneParams:
         seed=None
     )
 
+def _make_optimizer(search: str, seed: Optional[int]):
+    """search="bo" 且 skopt 可用时返回 GP+EI 的 skopt.Optimizer，否则返回 None。"""
+    if search != "bo":
+        return None
+    if Optimizer is None:
+        print("[提示] 未安装 scikit-optimize，改用随机扰动搜索（pip install scikit-optimize 启用贝叶斯优化）。")
+        return None
+    return Optimizer(SEARCH_SPACE, base_estimator="GP", acq_func="EI",
+                     n_initial_points=BO_INITIAL_POINTS, random_state=seed)
+
+def _failure_penalty(opt, scores: list) -> float:
+    """失败候选的惩罚分数：不低于 FAILED_SCORE_FLOOR，也不低于历史与本批最差分数的 2 倍。"""
+    return max([FAILED_SCORE_FLOOR] + [2.0 * y for y in list(opt.yi) + scores])
+
+def _scene_to_x(scene: SceneParams) -> list:
+    """SceneParams -> 搜索向量（夹紧到边界内，skopt 拒绝越界点）。"""
+    vals = (scene.scale_between, scene.spread_between, scene.burst_gamma)
+    return [max(lo, min(hi, float(v))) for v, (lo, hi) in zip(vals, SEARCH_SPACE)]
+
+def _scene_from_x(center: SceneParams, x) -> SceneParams:
+    """搜索向量 -> SceneParams，其余字段沿用 center。"""
+    return SceneParams(
+        realtime=center.realtime,
+        fixed_phase=center.fixed_phase,
+        allow_state_switch=center.allow_state_switch,
+        brand=center.brand,
+        model=center.model,
+        scale_between=float(x[0]),
+        spread_between=float(x[1]),
+        burst_gamma=float(x[2]),
+        avoid_bg_sleep=True,
+        seed=None
+    )
+
+
+def _max_expected_improvement(opt, probe_rng) -> Optional[float]:
+    """
+    GP 已拟合时，返回域内随机采样点上的最大 EI；GP 尚未拟合（仍在随机探索期）返回 None。
+    采样点取自独立的 probe_rng：若用 opt.rng，做一次早停检查就会改变后续 ask() 提议的点。
+    """
+    if not opt.models:
+        return None
+    X = opt.space.transform(opt.space.rvs(n_samples=EI_SAMPLES, random_state=probe_rng))
+    ei = gaussian_ei(X, opt.models[-1], y_opt=float(np.min(opt.yi)))
+    return float(np.max(ei))
+
+
+def _make_pool(batch_size: int) -> Optional[ProcessPoolExecutor]:
+    """
+    batch_size > 1 且平台支持 fork 时创建进程池，否则返回 None（批内串行执行）。
+    只用 fork：spawn 出的子进程会重新 import main → user_config，并发重写 1.txt/2.txt。
+    """
+    if batch_size <= 1 or "fork" not in mp.get_all_start_methods():
+        return None
+    return ProcessPoolExecutor(max_workers=batch_size, mp_context=mp.get_context("fork"),
+                               initializer=_reseed_worker)
+
+def _reseed_worker():
+    """fork 出的 worker 继承父进程的全局随机状态；各自用新的系统熵重新播种，避免批内候选抽到同一串值。"""
+    random.seed()
+    np.random.seed()
+
+def _terminate_pool(ex: ProcessPoolExecutor):
+    """
+    墙钟超时：cancel 只能取消尚未开始的候选，正在跑的仿真要直接终止 worker 进程，
+    否则解释器退出时仍会等它们跑完。终止后进程池不可再用。
+    """
+    terminate = getattr(ex, "terminate_workers", None)   # Python 3.14+
+    if terminate is not None:
+        terminate()
+        return
+    procs = list((getattr(ex, "_processes", None) or {}).values())
+    ex.shutdown(wait=False, cancel_futures=True)
+    for p in procs:
+        if p.is_alive():
+            p.terminate()
+    for p in procs:
+        p.join(timeout=5)
+
+def _run_batch(ex: Optional[ProcessPoolExecutor],
+               jobs: list,
+               timeout: float) -> list:
+    """
+    跑一批 run_one_simulation(**kwargs)，返回与 jobs 等长的列表：
+      (metrics, None) 成功；(None, exc) 仿真异常；None 表示墙钟超时被取消。
+    并行时超时会终止整个进程池（之后不可再提交）；串行时无法打断正在运行的仿真，与单候选时的行为一致。
+    """
+    if ex is None:
+        out = []
+        for kw in jobs:
+            try:
+                out.append((run_one_simulation(**kw)[0], None))
+            except Exception as e:
+                out.append((None, e))
+        return out
+
+    futs = {ex.submit(run_one_simulation, **kw): i for i, kw in enumerate(jobs)}
+    out = [None] * len(jobs)
+    try:
+        for fut in as_completed(futs, timeout=max(0.0, timeout)):
+            try:
+                out[futs[fut]] = (fut.result()[0], None)
+            except Exception as e:
+                out[futs[fut]] = (None, e)
+    except TimeoutError:
+        _terminate_pool(ex)
+    return out
 
 def autotune(target: Dict[str, float],
              dataset_type: str,
@@ -325,10 +588,17 @@ def autotune(target: Dict[str, float],
              walltime_sec: int,
              out_prefix: str,
              initial: Optional[SceneParams] = None,
-             seed: Optional[int] = None) -> Dict[str, Any]:
-
+             seed: Optional[int] = None,
+             batch_size: Optional[int] = None,
+             search: str = "bo") -> Dict[str, Any]:
+    """
+    每轮迭代并行评估 batch_size 个候选（默认 min(CPU 数, 4)），
+    用本批最小分数与历史最优比较来决定是否接受 / 计入早停。
+    search="bo" 时候选由贝叶斯优化提议，"random" 时围绕最优点随机扰动。
+    """
     if seed is not None:
         random.seed(seed)
+    batch_size = max(1, batch_size or min(os.cpu_count() or 1, 4))
 
     # 初始点（相对稳妥的一组）
     best_scene = initial or SceneParams(
@@ -347,79 +617,155 @@ def autotune(target: Dict[str, float],
     print("欢迎使用 probe request 传输仿真系统（自动调参模式）")
     print(f"[REAL TARGET] {target}")
     print(f"仿真参数设置：数据集类型 = {dataset_type}，仿真时长 = {duration_min} 分钟，设备数 = 1，"
-          f"固定品牌/机型 = {brand}/{model}，realtime={best_scene.realtime}\n")
+          f"固定品牌/机型 = {brand}/{model}，realtime={best_scene.realtime}，每轮候选数 = {batch_size}\n")
 
     t0 = time.time()
     best_metrics, best_errors, best_score = None, None, float("inf")
     no_improve = 0
+    iters_done = 0
+    stop_reason = "max_iters"
+    # 每轮结束时的最优分数，用于相对改进判定
+    recent_best = deque(maxlen=patience + 1)
 
-    history = []  # 记录每轮结果
-
-    for it in range(1, max_iters + 1):
-        now = time.time()
-        if now - t0 > walltime_sec:
-            print(f"\n[停止] 触发墙钟超时（{walltime_sec}s），结束调参。")
-            break
-
-        # 迭代 1 用最佳点；之后围绕最佳点扰动
-        scene = best_scene if best_metrics is None else random_params_around(best_scene, step_scale=0.25)
-        sim_tag = _unique_run_tag(f"{out_prefix}_iter{it}")
-        sim_out_base = os.path.join("calib_runs", sim_tag)
+    # 每个候选的结果即时追加到 JSONL，不在内存里累积；中途崩溃也保留已完成的记录
+    os.makedirs("calib_runs", exist_ok=True)
+    hist_path = os.path.join("calib_runs", f"{out_prefix}_history.jsonl")
+    hist_f = open(hist_path, "wb")
+    evals_done = 0
+
+    def record(rec: Dict[str, Any]):
+        nonlocal evals_done
+        hist_f.write(_dumps_line(rec))
+        hist_f.flush()
+        evals_done += 1
+
+    opt = _make_optimizer(search, seed)
+    # EI 早停检查的采样点用单独的随机源（skopt 的 rvs 只接受 RandomState / int）
+    ei_probe_rng = np.random.RandomState(seed)
+    ex = _make_pool(batch_size)
+    try:
+        for it in range(1, max_iters + 1):
+            now = time.time()
+            if now - t0 > walltime_sec:
+                print(f"\n[停止] 触发墙钟超时（{walltime_sec}s），结束调参。")
+                stop_reason = "walltime"
+                break
+            iters_done = it
+
+            # 迭代 1 先评估最佳点；其余候选由 BO 提议（或围绕最佳点扰动）
+            scenes = [best_scene] if it == 1 else []
+            n_new = batch_size - len(scenes)
+            if n_new > 0 and opt is not None:
+                xs = opt.ask(n_points=n_new) if n_new > 1 else [opt.ask()]
+                scenes += [_scene_from_x(best_scene, x) for x in xs]
+            else:
+                scenes += [random_params_around(best_scene, step_scale=0.25) for _ in range(n_new)]
+
+            print(f"\n===== 迭代 {it} / {max_iters}（本轮 {len(scenes)} 个候选）=====")
+            jobs = []
+            for k, scene in enumerate(scenes):
+                sim_tag = _unique_run_tag(f"{out_prefix}_iter{it}_{k}")
+                print(f"[PARAMS {k}]", {kk: v for kk, v in asdict(scene).items() if kk in ("scale_between","spread_between","burst_gamma","realtime")})
+                jobs.append(dict(
+                    sim_out_base=os.path.join("calib_runs", sim_tag),
+                    dataset_type=dataset_type,
+                    duration_min=duration_min,
+                    scene=scene,
+                    device_count=1
+                ))
+
+            results = _run_batch(ex, jobs, timeout=walltime_sec - (time.time() - t0))
+
+            # 打分，取本批最小分数
+            batch_best = None
+            acceptable = False
+            timed_out = False
+            told_x, told_y = [], []
+            failed_x = []
+            for k, (scene, res) in enumerate(zip(scenes, results)):
+                if res is None:
+                    timed_out = True
+                    record({"iter": it, "cand": k, "scene": asdict(scene), "error": "walltime_cancelled"})
+                    continue
+                sim_metrics, exc = res
+                if exc is not None:
+                    print(f"[迭代 {it}/{k}] 仿真异常：{repr(exc)}，跳过该候选。")
+                    record({"iter": it, "cand": k, "scene": asdict(scene), "error": "simulation_exception"})
+                    failed_x.append(_scene_to_x(scene))
+                    continue
+
+                score, errs = score_error(sim_metrics, target)
+                told_x.append(_scene_to_x(scene))
+                told_y.append(score)
+                record({
+                    "iter": it,
+                    "cand": k,
+                    "scene": asdict(scene),
+                    "sim": sim_metrics,
+                    "errors": errs,
+                    "score": score
+                })
+                print(f"[SIM {k}]   {sim_metrics}")
+                print(f"[ERROR {k}] {errs}  ->  [SCORE] {score:.6f}")
+
+                acceptable = acceptable or is_good_enough(errs)
+                if batch_best is None or score < batch_best[0]:
+                    batch_best = (score, scene, sim_metrics, errs)
+
+            ei_max = None
+            if opt is not None and failed_x:
+                penalty = _failure_penalty(opt, told_y)
+                told_x += failed_x
+                told_y += [penalty] * len(failed_x)
+            if opt is not None and told_x:
+                opt.tell(told_x, told_y)
+                ei_max = _max_expected_improvement(opt, ei_probe_rng)
+
+            if batch_best is None:
+                print(f"[迭代 {it}] 本轮无有效结果。")
+                no_improve += 1
+            elif batch_best[0] < best_score - 1e-9:
+                print("=> 接受：更优")
+                best_score, best_scene, best_metrics, best_errors = batch_best
+                no_improve = 0
+            else:
+                print("=> 拒绝：未改进")
+                no_improve += 1
+
+            if timed_out:
+                print(f"\n[停止] 触发墙钟超时（{walltime_sec}s），取消未完成的候选并结束调参。")
+                stop_reason = "walltime"
+                break
 
-        print(f"\n===== 迭代 {it} / {max_iters} =====")
-        print("[PARAMS]", {k: v for k, v in asdict(scene).items() if k in ("scale_between","spread_between","burst_gamma","realtime")})
+            if acceptable:
+                print("[停止] 达到可接受阈值，提前结束。")
+                stop_reason = "threshold"
+                break
 
-        try:
-            sim_metrics, stdout_s = run_one_simulation(
-                sim_out_base=sim_out_base,
-                dataset_type=dataset_type,
-                duration_min=duration_min,
-                scene=scene,
-                device_count=1
-            )
-        except Exception as e:
-            print(f"[迭代 {it}] 仿真异常：{repr(e)}，跳过该轮。")
-            history.append({"iter": it, "scene": asdict(scene), "error": "simulation_exception"})
-            no_improve += 1
             if no_improve >= patience:
-                print(f"[停止] 连续 {patience} 轮无有效结果（异常/无改进），早停。")
+                print(f"[停止] 连续 {patience} 轮无改进（或无有效结果），早停。")
+                stop_reason = "patience"
                 break
-            continue
-
-        # 打分
-        score, errs = score_error(sim_metrics, target)
-        history.append({
-            "iter": it,
-            "scene": asdict(scene),
-            "sim": sim_metrics,
-            "errors": errs,
-            "score": score
-        })
-
-        print(f"[SIM]   {sim_metrics}")
-        print(f"[ERROR] {errs}  ->  [SCORE] {score:.6f}")
-
-        improved = score < best_score - 1e-9
-        acceptable = is_good_enough(errs)
-
-        if improved:
-            print("=> 接受：更优")
-            best_scene = scene
-            best_metrics = sim_metrics
-            best_errors = errs
-            best_score = score
-            no_improve = 0
-        else:
-            print("=> 拒绝：未改进")
-            no_improve += 1
 
-        if acceptable:
-            print("[停止] 达到可接受阈值，提前结束。")
-            break
-
-        if no_improve >= patience:
-            print(f"[停止] 连续 {patience} 轮无改进，早停。")
-            break
+            if ei_max is not None:
+                print(f"[EI] 最大期望改进 = {ei_max:.3e}")
+                if ei_max < EI_EPS:
+                    print(f"[停止] 最大期望改进低于 {EI_EPS:g}，继续评估已无信息增益，早停。")
+                    stop_reason = "ei"
+                    break
+
+            if math.isfinite(best_score):
+                recent_best.append(best_score)
+                if len(recent_best) == recent_best.maxlen:
+                    rel = (recent_best[0] - recent_best[-1]) / max(abs(recent_best[0]), 1e-12)
+                    if rel < REL_IMPROVE_EPS:
+                        print(f"[停止] 连续 {patience} 轮最优分数相对改进 {rel:.2%} < {REL_IMPROVE_EPS:.0%}，早停。")
+                        stop_reason = "rel_improve"
+                        break
+    finally:
+        hist_f.close()
+        if ex is not None:
+            ex.shutdown(wait=False, cancel_futures=True)
 
     used_sec = time.time() - t0
     result = {
@@ -427,22 +773,23 @@ def autotune(target: Dict[str, float],
         "best_metrics": best_metrics,
         "best_errors": best_errors,
         "best_score": best_score,
-        "iters_done": len(history),
+        "iters_done": iters_done,
+        "evals_done": evals_done,
+        "stop_reason": stop_reason,
         "used_seconds": used_sec,
-        "history": history,
+        "history_file": hist_path,
     }
 
     # 保存结果
-    os.makedirs("calib_runs", exist_ok=True)
     out_path = os.path.join("calib_runs", f"{out_prefix}_result.json")
     with open(out_path, "w", encoding="utf-8") as f:
-        json.dump(result, f, ensure_ascii=False, indent=2)
+        f.write(_dumps(result))
 
     print("\n===== 调参结束 =====")
     print("最优参数：", result["best_params"])
     print("最优指标：", result["best_metrics"])
     print("误差：", result["best_errors"], "  分数：", f"{result['best_score']:.6f}")
-    print(f"历史记录与最优结果已保存：{out_path}")
+    print(f"最优结果已保存：{out_path}，逐候选历史记录：{hist_path}")
     print(f"总耗时：{used_sec:.1f}s")
     return result
 
@@ -459,6 +806,9 @@ def main_cli():
     ap.add_argument("--max-iters", type=int, default=12, help="最大迭代数")
     ap.add_argument("--patience", type=int, default=4, help="早停耐心轮次")
     ap.add_argument("--walltime-sec", type=int, default=900, help="总墙钟超时（秒）")
+    ap.add_argument("--batch-size", type=int, default=None, help="每轮并行评估的候选数（默认 min(CPU 数, 4)）")
+    ap.add_argument("--search", type=str, default="bo", choices=("bo", "random"),
+                    help="候选搜索策略：bo=贝叶斯优化（需 scikit-optimize），random=随机扰动")
 
     ap.add_argument("--seed", type=int, default=42, help="随机种子（影响采样）")
     ap.add_argument("--prefix", type=str, default="calib", help="输出前缀（用于结果/中间文件命名）")
@@ -474,8 +824,8 @@ def main_cli():
     target = DEFAULT_TARGET.copy()
     if args.target_json and os.path.exists(args.target_json):
         try:
-            with open(args.target_json, "r", encoding="utf-8") as f:
-                j = json.load(f)
+            with open(args.target_json, "rb") as f:
+                j = _loads(f.read())
             # 允许大小写/别名，做一层稳健映射
             def pick(*keys, default=0.0):
                 for k in keys:
@@ -515,7 +865,9 @@ def main_cli():
         walltime_sec=args.walltime_sec,
         out_prefix=args.prefix,
         initial=init,
-        seed=args.seed
+        seed=args.seed,
+        batch_size=args.batch_size,
+        search=args.search
     )
 
 
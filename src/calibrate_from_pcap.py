@@ -12,99 +12,231 @@
 - 可选：立即运行一次仿真并用 shiyan.py 验证三指标差距
 
 依赖：scapy (解析 802.11), numpy, pandas
+可选：numba（加速 burst/换 MAC 扫描，缺失时回退到纯 NumPy）
 """
-import os, sys, json, math, shutil, random
+import os, sys, json, math, shutil, random, hashlib
+from array import array
 from pathlib import Path
 from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 import numpy as np
 
 try:
-    from scapy.all import rdpcap, Dot11
+    from scapy.all import PcapReader, RawPcapReader, Dot11, sniff, conf
 except Exception as e:
     print("请先安装 scapy：pip install scapy")
     sys.exit(1)
 
+# numba 为可选依赖：可用时对 burst/换 MAC 扫描做 JIT，否则走纯 NumPy 路径
+try:
+    from numba import njit
+except Exception:
+    njit = None
+
+def _tjit(**jit_kwargs):
+    """numba 可用时等价于 njit(**jit_kwargs)，否则原样返回函数。"""
+    def deco(fn):
+        return njit(**jit_kwargs)(fn) if njit is not None else fn
+    return deco
+
 # --------- 可调参数 ---------
 # 判定 burst 内包间隔阈值（秒），小于该阈值视为同一 burst
 INTRA_BURST_TH = 0.25
 # “相邻换 MAC”间隔 -> 近似 “轮换间隔”
 # 我们将其拟合为对数正态分布(离散化后写入 2.txt)
 NUM_BINS = 6
+# 可按原始字节直接解析的链路类型（pcap 头里的 linktype）
+DLT_IEEE802_11 = 105          # 裸 802.11 帧
+DLT_IEEE802_11_RADIO = 127    # radiotap + 802.11
+# 兜底解析路径的 BPF 过滤式：只保留 Probe Request（需要 tcpdump 可执行文件）
+PROBE_REQ_BPF = "type mgt subtype probe-req"
+# 单个 pcap 的指标缓存目录；键 = (绝对路径, mtime_ns, size)，文件变动即失效
+PCAP_CACHE_DIR = Path(os.environ.get("XDG_CACHE_HOME", Path.home() / ".cache")) / "wifisim" / "pcap_metrics"
+# 指标算法/阈值变化时递增，避免命中旧口径的缓存
+PCAP_CACHE_VERSION = 1
 RANDOM_SEED = 42
 random.seed(RANDOM_SEED)
 np.random.seed(RANDOM_SEED)
 
 # --------- 指标计算 ---------
-def read_probe_seq(pcap_path: Path):
-    pkts = rdpcap(str(pcap_path))
-    seq = []
-    t0 = None
-    for p in pkts:
-        if not p.haslayer(Dot11):
+def _read_probe_seq_raw(rd):
+    """
+    快速路径：不构建 scapy 对象树，直接看 802.11 帧头字节。
+    帧控制字段首字节 bit2-3 为 type、bit4-7 为 subtype；管理帧的 addr2 固定在偏移 10..16。
+    """
+    radiotap = rd.linktype == DLT_IEEE802_11_RADIO
+    ts_unit = 1e-9 if rd.nano else 1e-6
+    times, macs = array("d"), array("Q")
+    for buf, meta in rd:
+        off = int.from_bytes(buf[2:4], "little") if radiotap else 0
+        if len(buf) < off + 16:
+            continue
+        fc = buf[off]
+        # type=0 管理帧, subtype=4 Probe Request
+        if (fc >> 2) & 0x3 != 0 or fc >> 4 != 4:
             continue
+        times.append(meta.sec + meta.usec * ts_unit)
+        macs.append(int.from_bytes(buf[off+10:off+16], "big"))
+    return times, macs
+
+def _read_probe_seq_dissect(pcap_path: Path):
+    """
+    兜底路径（pcapng / 其它链路类型）：逐包流式读取并用 scapy 解析。
+    有 tcpdump 时先用 BPF 在 C 层丢掉非 Probe Request 帧，只解析剩下的少数包。
+    """
+    times, macs = array("d"), array("Q")
+
+    def take(p):
+        if not p.haslayer(Dot11):
+            return
         d = p[Dot11]
         # type=0 管理帧, subtype=4 Probe Request
         if getattr(d, "type", None) == 0 and getattr(d, "subtype", None) == 4:
             sa = getattr(d, "addr2", None)
-            ts = float(getattr(p, "time", 0.0))
             if sa is None:
-                continue
-            if t0 is None:
-                t0 = ts
-            seq.append((ts - t0, sa))
-    # 按时间排序
-    seq.sort(key=lambda x: x[0])
-    return seq  # [(t, mac), ...]
-
-def compute_metrics(seq):
-    if not seq:
-        return dict(MCR=0.0, NUMR=0.0, MCIV=0.0, avg_intra=0.0, burst_sizes=[], change_intervals=[])
-    times = [t for t,_ in seq]
-    macs  = [m for _,m in seq]
-    n = len(seq)
-    # MCR：每分钟的 MAC 变化次数
-    changes = 0
-    change_times = []
-    for i in range(1, n):
-        if macs[i] != macs[i-1]:
-            changes += 1
-            change_times.append(times[i])
-    duration = max(1e-6, times[-1] - times[0])
-    mcr = changes / max(1.0, duration/60.0)  # 次/分钟
+                return
+            times.append(float(getattr(p, "time", 0.0)))
+            macs.append(int(sa.replace(":", ""), 16))
 
-    # NUMR：唯一MAC数 / 总Probe帧数
-    numr = len(set(macs)) / float(n) if n>0 else 0.0
+    if shutil.which(conf.prog.tcpdump):
+        try:
+            sniff(offline=str(pcap_path), filter=PROBE_REQ_BPF, prn=take, store=False)
+            return times, macs
+        except Exception:
+            # 非 802.11 链路类型等导致过滤式编译失败时，退回逐包解析
+            times, macs = array("d"), array("Q")
 
-    # MCIV：相邻换MAC的时间间隔方差
-    change_intervals = np.diff(change_times) if len(change_times) >= 2 else np.array([])
-    mciv = float(np.var(change_intervals)) if change_intervals.size>=1 else 0.0
+    with PcapReader(str(pcap_path)) as rd:
+        for p in rd:
+            take(p)
+    return times, macs
+
+def read_probe_seq(pcap_path: Path):
+    """
+    返回两条平行数组 (times, macs)：times 为相对首包的秒数(float64)，macs 为 48 位 MAC 打包成的 uint64，已按时间排序。
+    """
+    # 流式读取，不再用 rdpcap 把整个文件载入内存
+    with RawPcapReader(str(pcap_path)) as rd:
+        if getattr(rd, "linktype", None) in (DLT_IEEE802_11, DLT_IEEE802_11_RADIO):
+            cols = _read_probe_seq_raw(rd)
+        else:
+            cols = None
+    if cols is None:
+        cols = _read_probe_seq_dissect(pcap_path)
+    times = np.frombuffer(cols[0], dtype=np.float64)
+    # MAC 打包为整数：后续比较/因子化都是定长整数运算，不再比较 17 字符的字符串
+    macs = np.frombuffer(cols[1], dtype=np.uint64)
+    if times.size:
+        times = times - times[0]   # 以首包为时间零点
+    # 按时间稳定排序（与原先 list.sort 的次序一致）
+    order = np.argsort(times, kind="stable")
+    return times[order], macs[order]
 
-    # 估计 burst 规模与包内间隔
-    burst_sizes = []
-    intra_gaps = []
+@_tjit(cache=True, fastmath=True)
+def _scan_bursts(times, mac_ids, intra_th):
+    """
+    单次遍历：统计换 MAC 次数/时刻、burst 规模与包内间隔之和。
+    返回 (num_changes, change_times, burst_sizes, intra_gap_sum, intra_gap_count)
+    """
+    n = times.shape[0]
+    change_times = np.empty(n, dtype=np.float64)
+    burst_sizes = np.empty(n, dtype=np.int64)
+    nc = 0
+    nb = 0
     cur_len = 1
+    gap_sum = 0.0
+    gap_cnt = 0
     for i in range(1, n):
+        if mac_ids[i] != mac_ids[i-1]:
+            change_times[nc] = times[i]
+            nc += 1
         gap = times[i] - times[i-1]
-        if gap <= INTRA_BURST_TH:
+        if gap <= intra_th:
             cur_len += 1
-            intra_gaps.append(gap)
+            gap_sum += gap
+            gap_cnt += 1
         else:
-            burst_sizes.append(cur_len)
+            burst_sizes[nb] = cur_len
+            nb += 1
             cur_len = 1
-    burst_sizes.append(cur_len)
-    avg_intra = float(np.mean(intra_gaps)) if intra_gaps else 0.05
+    burst_sizes[nb] = cur_len
+    nb += 1
+    return nc, change_times[:nc], burst_sizes[:nb], gap_sum, gap_cnt
+
+def compute_metrics(times, macs):
+    n = len(times)
+    if n == 0:
+        return dict(MCR=0.0, NUMR=0.0, MCIV=0.0, avg_intra=0.0, burst_sizes=[], change_intervals=[])
+    # MAC 字符串一次性因子化为 int64 编号：后续只比较整数（JIT 内核也只接受基本类型），唯一值个数顺带给出 NUMR
+    uniq, mac_ids = np.unique(macs, return_inverse=True)
+    mac_ids = mac_ids.astype(np.int64, copy=False)
+
+    if njit is not None:
+        changes, change_times, burst_arr, gap_sum, gap_cnt = _scan_bursts(times, mac_ids, INTRA_BURST_TH)
+        burst_sizes = burst_arr.tolist()
+        avg_intra = gap_sum / gap_cnt if gap_cnt else 0.05
+    else:
+        change_mask = mac_ids[1:] != mac_ids[:-1]
+        changes = int(np.count_nonzero(change_mask))
+        change_times = times[1:][change_mask]
+
+        # 估计 burst 规模与包内间隔：间隔超过阈值处即 burst 边界
+        gaps = np.diff(times)
+        intra_mask = gaps <= INTRA_BURST_TH
+        boundaries = np.flatnonzero(~intra_mask)
+        burst_sizes = np.diff(np.r_[-1, boundaries, n-1]).tolist()
+        intra_gaps = gaps[intra_mask]
+        avg_intra = float(intra_gaps.mean()) if intra_gaps.size else 0.05
+
+    # MCR：每分钟的 MAC 变化次数
+    duration = max(1e-6, float(times[-1] - times[0]))
+    mcr = changes / max(1.0, duration/60.0)  # 次/分钟
+
+    # NUMR：唯一MAC数 / 总Probe帧数
+    numr = len(uniq) / float(n)
+
+    # MCIV：相邻换MAC的时间间隔方差
+    change_intervals = np.diff(change_times) if change_times.size >= 2 else np.array([])
+    mciv = float(np.var(change_intervals)) if change_intervals.size>=1 else 0.0
 
     return dict(MCR=mcr, NUMR=numr, MCIV=mciv, avg_intra=avg_intra,
                 burst_sizes=burst_sizes, change_intervals=change_intervals.tolist())
 
+def _metrics_for(pcap_path: Path):
+    """read_probe_seq + compute_metrics，结果按 (路径, mtime, size) 缓存到磁盘。"""
+    pcap_path = Path(pcap_path).resolve()
+    st = pcap_path.stat()
+    raw_key = f"{pcap_path}|{st.st_mtime_ns}|{st.st_size}|{INTRA_BURST_TH}|v{PCAP_CACHE_VERSION}"
+    cache_file = PCAP_CACHE_DIR / (hashlib.sha1(raw_key.encode("utf-8")).hexdigest() + ".json")
+    try:
+        return json.loads(cache_file.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        pass
+
+    m = compute_metrics(*read_probe_seq(pcap_path))
+    try:
+        PCAP_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        tmp = cache_file.with_suffix(f".{os.getpid()}.tmp")
+        tmp.write_text(json.dumps(m), encoding="utf-8")
+        os.replace(tmp, cache_file)
+    except OSError:
+        # 缓存只是加速手段，写失败不影响标定
+        pass
+    return m
+
 def aggregate_metrics(pcaps):
     # 对多份 pcap 取中位数/众数等鲁棒统计
     MCRs, NUMRs, MCIVs = [], [], []
     intra_list, all_burst_sizes, all_change_ints = [], [], []
-    for p in pcaps:
-        seq = read_probe_seq(p)
-        m = compute_metrics(seq)
+    pcaps = [Path(p) for p in pcaps]
+    # 各 pcap 相互独立：多份时按进程并行解析（缓存命中的很快返回）
+    if len(pcaps) > 1:
+        with ProcessPoolExecutor(max_workers=min(len(pcaps), os.cpu_count() or 1)) as ex:
+            per_pcap = list(ex.map(_metrics_for, pcaps))
+    else:
+        per_pcap = [_metrics_for(p) for p in pcaps]
+    for m in per_pcap:
         MCRs.append(m["MCR"]); NUMRs.append(m["NUMR"]); MCIVs.append(m["MCIV"])
         intra_list.append(m["avg_intra"])
         all_burst_sizes += m["burst_sizes"]
@@ -121,20 +253,14 @@ def aggregate_metrics(pcaps):
 
 # --------- 反推 -> 离散分布（写入 1.txt / 2.txt）---------
 def to_discrete_dist(samples, num_bins=NUM_BINS, clip_min=0.02, clip_max=120.0):
-    if not samples:
-        # 合理兜底：均匀 6 桶
-        edges = np.linspace(clip_min, clip_max, num_bins+1)
-        probs = np.ones(num_bins) / num_bins
-        mids  = 0.5*(edges[1:]+edges[:-1])
-        return dict(zip(np.round(mids,3).tolist(), np.round(probs,4).tolist()))
-    arr = np.array(samples, dtype=float)
+    # samples 可为 list 或 ndarray；已是 float64 数组时不再复制
+    arr = np.asarray(samples, dtype=np.float64)
     arr = arr[(arr>=clip_min) & (arr<=clip_max)]
-    if arr.size==0:
-        arr = np.array([clip_min, clip_max, (clip_min+clip_max)/2])
-    hist, edges = np.histogram(arr, bins=num_bins)
-    hist = hist.astype(float);
-    if hist.sum()==0: hist += 1.0
-    probs = hist / hist.sum()
+    # 分桶范围取样本实际范围；无有效样本时退化为 [clip_min, clip_max]
+    rng = (arr.min(), arr.max()) if arr.size else (clip_min, clip_max)
+    hist, edges = np.histogram(arr, bins=num_bins, range=rng)
+    # 拉普拉斯平滑：无样本时自然得到均匀分布，不再单独分支
+    probs = (hist + 1e-9) / (hist.sum() + num_bins*1e-9)
     mids  = 0.5*(edges[1:]+edges[:-1])
     # 规范化到 3 位
     mids = np.round(mids, 3).tolist()
@@ -221,15 +347,15 @@ def calibrate(vendor="Xiaomi", model="xiaomi_auto",
     between_dist = to_discrete_dist(target["change_intervals"], num_bins=NUM_BINS, clip_min=1.0, clip_max=300.0)
     # 2) 包内间隔分布（由 avg_intra 附近构造一个窄分布）
     intra_samples = np.random.normal(loc=max(0.01, target["avg_intra"]), scale=max(0.005, 0.25*target["avg_intra"]), size=120)
-    int_burst_dist = to_discrete_dist(intra_samples.tolist(), num_bins=4, clip_min=0.01, clip_max=0.5)
+    int_burst_dist = to_discrete_dist(intra_samples, num_bins=4, clip_min=0.01, clip_max=0.5)
     # 3) burst 长度分布（1.txt）
     bl_map = burst_len_dist(target["burst_sizes"])
     # 4) jitter：给 0~0.05s 的均匀/三角分布离散化（更贴近真实抖动）
     jitter_samples = np.random.triangular(left=0.0, mode=0.01, right=0.05, size=200)
-    jitter_dist = to_discrete_dist(jitter_samples.tolist(), num_bins=4, clip_min=0.0, clip_max=0.08)
+    jitter_dist = to_discrete_dist(jitter_samples, num_bins=4, clip_min=0.0, clip_max=0.08)
     # 5) state_dwell：若你只做“单设备可切换/不可切换”两类，可给个温和的停留时间分布
     dwell_samples = np.random.lognormal(mean=np.log(45), sigma=0.6, size=200)
-    state_dwell = to_discrete_dist(dwell_samples.tolist(), num_bins=4, clip_min=10.0, clip_max=240.0)
+    state_dwell = to_discrete_dist(dwell_samples, num_bins=4, clip_min=10.0, clip_max=240.0)
 
     # ---- 写回 1.txt / 2.txt ----
     p1 = Path("1.txt"); p2 = Path("2.txt")
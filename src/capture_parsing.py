@@ -7,9 +7,9 @@ class CapturedFrame:
         self.rssi = rssi
 
 
-def capture_frame(frame):
-    # 为帧分配随机 RSSI（-40 到 -90 dBm）
-    rssi = -(40 + random.randint(0, 50))
+def capture_frame(frame, rng=random):
+    # 为帧分配随机 RSSI（-40 到 -90 dBm）；rng 为 random.Random 实例或 random 模块
+    rssi = -(40 + rng.randint(0, 50))
     return CapturedFrame(frame, rssi)
 
 
@@ -1,16 +1,67 @@
+import os
 from datetime import datetime
+from functools import lru_cache
 from scapy.layers.dot11 import Dot11, RadioTap, Dot11ProbeReq, Dot11Elt, Dot11EltRates, Dot11EltDSSSet, Dot11EltVendorSpecific
-from numpy import random
-import random as pyrandom
+import numpy as np
 from user_space import random_MAC, get_oui, get_frequency, produce_sequenceNumber
 
-def parse_rates(rates_str: str) -> list:
+_PROC_RNG = None
+_PROC_RNG_PID = None
+
+
+def seed_rng(seed=None):
+    """重新播种帧层随机源（int、SeedSequence 或 None），并丢弃各随机池中已预抽的值。"""
+    global _PROC_RNG, _PROC_RNG_PID
+    _PROC_RNG = np.random.default_rng(seed)
+    _PROC_RNG_PID = os.getpid()
+    for pool in _POOLS:
+        pool.clear()
+
+
+def _proc_rng() -> np.random.Generator:
+    """
+    本进程的 numpy Generator，由 seed_rng 播种（Simulator 构造时调用）。
+    未在本进程播种过（如 fork 出、没有建 Simulator 的子进程）时用新的系统熵重建，
+    避免沿用父进程的随机状态。
+    """
+    global _PROC_RNG, _PROC_RNG_PID
+    if _PROC_RNG_PID != os.getpid():
+        _PROC_RNG = np.random.default_rng()
+        _PROC_RNG_PID = os.getpid()
+    return _PROC_RNG
+
+
+class _IntPool:
     """
-    将支持速率字符串（格式："6:0.25/9:0.25/12:0.25/18:0.25"）解析为速率列表 [6,9,12,18]
-    概率部分忽略，仅返回速率值。
+    批量预抽的随机整数池：一次抽 size 个 [low, high) 的整数，逐个取用，用完再补。
+    fork 出的子进程会继承父进程剩余的池，按 pid 判断后从本进程的 _proc_rng() 重抽。
+    """
+    def __init__(self, low: int, high: int, size: int = 4096):
+        self.low, self.high, self.size = low, high, size
+        self._buf = []
+        self._pid = None
+
+    def next(self) -> int:
+        if not self._buf or self._pid != os.getpid():
+            self._buf = _proc_rng().integers(self.low, self.high, size=self.size).tolist()
+            self._pid = os.getpid()
+        return self._buf.pop()
+
+    def clear(self):
+        self._buf = []
+
+_RSSI_POOL = _IntPool(30, 71)        # 信号强度 30~70（取负即 dBm）
+_MAC_BYTE_POOL = _IntPool(0, 256)    # OUI 之后的 MAC 字节
+_POOLS = (_RSSI_POOL, _MAC_BYTE_POOL)
+
+@lru_cache(maxsize=256)
+def parse_rates(rates_str: str) -> tuple:
+    """
+    将支持速率字符串（格式："6:0.25/9:0.25/12:0.25/18:0.25"）解析为速率元组 (6,9,12,18)
+    概率部分忽略，仅返回速率值。同一设备的速率串反复出现，结果按字符串缓存（元组不可变，可安全共享）。
     """
     if not rates_str:
-        return []
+        return ()
     pairs = rates_str.split("/")
     rates = []
     for pair in pairs:
@@ -19,7 +70,7 @@ def parse_rates(rates_str: str) -> list:
             rates.append(int(rate))
         except Exception:
             continue
-    return rates
+    return tuple(rates)
 
 def create_probe(vendor: str,
                  randomization: int,
@@ -32,7 +83,7 @@ def create_probe(vendor: str,
                  HT_capabilities: bytes,
                  wps: bytes,
                  uuide: bytes,
-                 time: datetime,
+                 time,
                  channel: int,
                  supported_rates: str,
                  ext_supported_rates: str) -> tuple[str, list]:
@@ -40,14 +91,10 @@ def create_probe(vendor: str,
     radio = create_radio(channel)
     dot11, seq_number, mac_address = create_80211(vendor, randomization, seq_number=0, mac_address=mac_address, burst_lenght=burst_length)
 
-    dot11Array = []
-    for i in range(1, int(burst_length)):
-        dot11burst, seq_number, mac_address = create_80211(vendor, randomization, seq_number=seq_number+1, mac_address=mac_address, burst_lenght=burst_length)
-        dot11Array.append(dot11burst)
-
     probeReq = Dot11ProbeReq()
-    if ssid:
-        dot11elt = create_informationElement(ssid=random.choice(ssid))
+    # ssid 可以是字符串列表或 Device.SSID 的定长字节串数组
+    if len(ssid):
+        dot11elt = create_informationElement(ssid=ssid[_proc_rng().integers(len(ssid))])
     else:
         dot11elt = create_informationElement(ssid="")
     dot11eltrates = create_supportedRates(supported_rates)
@@ -61,32 +108,24 @@ def create_probe(vendor: str,
         dot11eltVHTcap = create_VHTcapabilities(VHT_capabilities)
     dot11eltEXTcap = create_Extendendcapabilities(extended_capabilities)
 
+    # burst 内各帧只有 802.11 头不同：Probe Request 及其后的信息元素只拼一次
+    tail = probeReq / dot11elt / dot11eltrates / dot11eltratesext / dot11eltdssset / dot11elthtcap
     if VHT_capabilities is not None:
-        if wps and uuide:
-            frame = radio / dot11 / probeReq / dot11elt / dot11eltrates / dot11eltratesext / dot11eltdssset / dot11elthtcap / dot11eltVHTcap / dot11eltEXTcap / dot11eltven / dot11wps / dot11uuide
-        else:
-            frame = radio / dot11 / probeReq / dot11elt / dot11eltrates / dot11eltratesext / dot11eltdssset / dot11elthtcap / dot11eltVHTcap / dot11eltEXTcap / dot11eltven
-    else:
-        if wps and uuide:
-            frame = radio / dot11 / probeReq / dot11elt / dot11eltrates / dot11eltratesext / dot11eltdssset / dot11elthtcap / dot11eltEXTcap / dot11eltven / dot11wps / dot11uuide
-        else:
-            frame = radio / dot11 / probeReq / dot11elt / dot11eltrates / dot11eltratesext / dot11eltdssset / dot11elthtcap / dot11eltEXTcap / dot11eltven
+        tail = tail / dot11eltVHTcap
+    tail = tail / dot11eltEXTcap / dot11eltven
+    if wps and uuide:
+        tail = tail / dot11wps / dot11uuide
 
+    frame = radio / dot11 / tail
     packets.append(frame)
-    t_ref = time.timestamp()
+    t_ref = time.timestamp() if isinstance(time, datetime) else float(time)   # 仿真器传 Unix 秒，也兼容 datetime
     frame.time = t_ref
 
     for i in range(1, int(burst_length)):
-        if VHT_capabilities is not None:
-            if wps and uuide:
-                frame = radio / dot11Array.pop(0) / probeReq / dot11elt / dot11eltrates / dot11eltratesext / dot11eltdssset / dot11elthtcap / dot11eltVHTcap / dot11eltEXTcap / dot11eltven / dot11wps / dot11uuide
-            else:
-                frame = radio / dot11Array.pop(0) / probeReq / dot11elt / dot11eltrates / dot11eltratesext / dot11eltdssset / dot11elthtcap / dot11eltVHTcap / dot11eltEXTcap / dot11eltven
-        else:
-            if wps and uuide:
-                frame = radio / dot11Array.pop(0) / probeReq / dot11elt / dot11eltrates / dot11eltratesext / dot11eltdssset / dot11elthtcap / dot11eltEXTcap / dot11eltven / dot11wps / dot11uuide
-            else:
-                frame = radio / dot11Array.pop(0) / probeReq / dot11elt / dot11eltrates / dot11eltratesext / dot11eltdssset / dot11elthtcap / dot11eltEXTcap / dot11eltven
+        # 后续帧的 802.11 头就地生成（MAC 已确定、序列号递增，不消耗随机数）
+        dot11burst, seq_number, mac_address = create_80211(vendor, randomization, seq_number=seq_number+1, mac_address=mac_address, burst_lenght=burst_length)
+        # “/” 会复制两侧的层，tail 可以直接复用
+        frame = radio / dot11burst / tail
         t_ref += inter_pkt_time
         frame.time = t_ref
         packets.append(frame)
@@ -99,7 +138,7 @@ def create_radio(channel: int):
                     Rate=1.0,
                     ChannelFrequency=get_frequency(channel),
                     ChannelFlags='CCK+2GHz',
-                    dBm_AntSignal=-pyrandom.randint(30,70),
+                    dBm_AntSignal=-_RSSI_POOL.next(),
                     Antenna=0)
 
 def create_80211(vendor, randomization, seq_number, mac_address, burst_lenght):
@@ -108,10 +147,10 @@ def create_80211(vendor, randomization, seq_number, mac_address, burst_lenght):
         if randomization == 0:
             vendor_oui = get_oui(vendor)[0].lower()
             if vendor_oui:
-                mac_address = vendor_oui + (":%02x:%02x:%02x" % (pyrandom.randint(0,255), pyrandom.randint(0,255), pyrandom.randint(0,255))).lower()
+                mac_address = vendor_oui + ":" + bytes((_MAC_BYTE_POOL.next(), _MAC_BYTE_POOL.next(), _MAC_BYTE_POOL.next())).hex(":")
     if seq_number == 0:
-        # 将 burst_lenght 转换为整数，确保 randint 参数正确
-        seq_number = pyrandom.randint(0, 4095 - int(burst_lenght))
+        # 起始序列号取 [0, 4095 - burst_lenght]，保证整个 burst 递增后不超过 4095
+        seq_number = int(_proc_rng().integers(0, 4096 - int(burst_lenght)))
     return [Dot11(addr1='ff:ff:ff:ff:ff:ff',
                   addr2=mac_address,
                   addr3='ff:ff:ff:ff:ff:ff',
@@ -123,12 +162,10 @@ def create_informationElement(ssid):
     return Dot11Elt(ID=0, info=ssid) if ssid else Dot11Elt(ID=0)
 
 def create_supportedRates(rates_str):
-    rates = parse_rates(rates_str)
-    return Dot11EltRates(ID=1, rates=rates)
+    return Dot11EltRates(ID=1, rates=list(parse_rates(rates_str)))
 
 def create_extendedSupportedRates(rates_str):
-    rates = parse_rates(rates_str)
-    return Dot11EltRates(ID=50, rates=rates)
+    return Dot11EltRates(ID=50, rates=list(parse_rates(rates_str)))
 
 def create_DSSSparameterSet(channel: int):
     return Dot11EltDSSSet(channel=channel)
@@ -1,16 +1,22 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
-from datetime import datetime, timedelta
+from datetime import datetime
 import time
+import math
 import random
+import heapq
+import bisect
+import itertools
 import csv
+import argparse
 from typing import Optional
 import numpy as np
 import capture_parsing
-from user_space import Device, DeviceRates
+from user_space import Device, DeviceRates, MotionTable, seed_rng
 from kernel_driver import create_probe, create_80211
+import kernel_driver
 import user_config  # 确保配置文件已生成
-from scapy.utils import wrpcap
+from scapy.utils import PcapWriter
 from phy_layer import PhysicalLayer  # 物理层模块
 
 # 允许被 import 而不触发交互
@@ -19,7 +25,7 @@ dataset_count = 1
 print("欢迎使用probe request传输仿真系统")
 
 # ------------------- 小工具：按品牌/型号挑设备 -------------------
-def _pick_model_by_vendor(device_rates: DeviceRates, vendor_input: str, model_input: Optional[str]):
+def _pick_model_by_vendor(device_rates: DeviceRates, vendor_input: str, model_input: Optional[str], rng=random):
     """
     从内部数据库中按品牌（vendor）筛选型号（model）。
     - vendor_input 支持大小写/前缀匹配
@@ -39,7 +45,7 @@ def _pick_model_by_vendor(device_rates: DeviceRates, vendor_input: str, model_in
             for k, v in candidates.items():
                 if k.startswith(key):
                     return v["vendor"], v["model"], int(v["randomization"])
-        k = random.choice(list(candidates.keys()))
+        k = rng.choice(list(candidates.keys()))
         v = candidates[k]
         return v["vendor"], v["model"], int(v["randomization"])
     except Exception:
@@ -47,7 +53,7 @@ def _pick_model_by_vendor(device_rates: DeviceRates, vendor_input: str, model_in
 
 
 # ------------------- 交互式配置 -------------------
-def generate_dataset_config(run):
+def generate_dataset_config(run, rng=random):
     print(f"\n----- 配置数据集 {run} -----")
 
     dataset_type_input = input(
@@ -126,10 +132,10 @@ def generate_dataset_config(run):
     if scene_choice == "1":
         device_count_input = input("请输入初始设备数（正整数，或留空系统随机生成）：").strip()
         try:
-            device_count = int(device_count_input) if device_count_input != "" else random.randint(10, 30)
+            device_count = int(device_count_input) if device_count_input != "" else rng.randint(10, 30)
         except Exception:
             print("输入有误，自动生成设备数")
-            device_count = random.randint(10, 30)
+            device_count = rng.randint(10, 30)
         scene_params = {
             "density": "auto",
             "mobility": "高流动",
@@ -172,7 +178,7 @@ def generate_dataset_config(run):
         }
     else:
         print("输入有误，默认选择 高流动（设备密度自动生成）")
-        device_count = random.randint(10, 30)
+        device_count = rng.randint(10, 30)
         scene_params = {
             "density": "auto",
             "mobility": "高流动",
@@ -190,9 +196,7 @@ def generate_dataset_config(run):
     return dataset_type, sim_duration_minutes, device_count, scene_params
 
 
-# ------------------- 物理层与队列延迟 -------------------
-phy = PhysicalLayer(tx_power=20, frequency=2400, env="auto")
-
+# ------------------- 队列延迟 -------------------
 def simulate_queue_delay(queue_length, service_rate=100):
     """
     简化版 M/M/1 等待时间期望（秒）：1/(μ-λ)，若不稳定则给个小常数。
@@ -206,18 +210,67 @@ def simulate_queue_delay(queue_length, service_rate=100):
 
 
 # ------------------- 模拟器本体 -------------------
+LOG_BUFFER_SIZE = 65536  # .txt / _probe_ids.txt 的写缓冲（字节）
+
 class Simulator:
     def __init__(self, out_file, avg_permanence_time, scene_params, dataset_type):
         self.device_rates = DeviceRates()
         self.out_file = out_file
         self.next_id_device = 0
         self.number_of_devices_available = 0
+        # 事件堆：元素为 (start_time, 同刻次序, 入队序号, event)，堆顶即下一个要处理的事件
         self.events_list = []
+        self._event_seq = itertools.count()
+        # 待处理的 create_device 事件在任一设备删除后整体作废（见 is_stale_event）
+        self._creation_epoch = 0
+        # 模拟器私有的随机源：scene_params["seed"] 给定且 1.txt / 2.txt 相同时整次仿真可复现
+        # （事件时间、设备属性、MAC、RSSI、序列号都由下面这些源派生）
+        seed = scene_params.get("seed")
+        self.rng = np.random.default_rng(seed)   # 批量/向量化抽样
+        self.pyrng = random.Random(seed)         # 逐事件的标量抽样
+        # 设备属性/SSID/MAC/WPS 由 user_space 的随机源抽取，每个模拟器都用派生子种子重新播种，避免与 rng 同流；
+        # seed 为 None 时 SeedSequence 取新的系统熵，fork 出的并行仿真不会沿用父进程的随机状态
+        # 帧层（RSSI / MAC 字节 / SSID 选择 / 序列号）同样用派生子种子播种
+        device_seed, frame_seed = np.random.SeedSequence(seed).spawn(2)
+        seed_rng(device_seed)
+        kernel_driver.seed_rng(frame_seed)
+        self.phy = PhysicalLayer(tx_power=20, frequency=2400, env="auto", rng=self.rng)
         self.devices_list = []
+        self.motion = MotionTable(rng=self.rng)   # 全部设备的位置/速度/方向（SoA）
         self.avg_permanence_time = avg_permanence_time  # 单位秒
         self.channel = 6
         self.scene_params = scene_params
         self.dataset_type = dataset_type  # "multi" | "single_switch" | "single_static"
+        # 默认按虚拟时间推进（不 sleep）；scene_params["realtime"]=True 时按墙钟节奏运行
+        self.realtime = bool(scene_params.get("realtime", False))
+        # 抽样质检：比例为 0 时整段跳过，连随机数也不抽
+        self.qa_rate = float(scene_params.get("qa_sample_rate", 0.0) or 0.0)
+        self.qa_enabled = self.qa_rate > 0
+        self.burst_interval_multiplier = float(scene_params.get("burst_interval_multiplier", 1.0))
+        # (model, phase, 分布名) -> (取值数组, 累积概率表)；分布为空时缓存为 None
+        self._sampler_cache = {}
+        # 仿真期间常开的输出句柄，由 open_outputs / close_outputs 管理
+        self.pcap_writer = None
+        self.txt_log = None
+        self.probe_ids_log = None
+
+    def open_outputs(self):
+        """打开（并清空）.pcap / .txt / _probe_ids.txt，整个仿真期间复用同一组句柄。"""
+        self.pcap_writer = PcapWriter(self.out_file + ".pcap", append=False, sync=False)
+        self.txt_log = open(self.out_file + '.txt', 'w', buffering=LOG_BUFFER_SIZE)
+        self.probe_ids_log = open(self.out_file + '_probe_ids.txt', 'w', buffering=LOG_BUFFER_SIZE)
+
+    def flush_outputs(self):
+        """把缓冲中的文本日志写到磁盘；在设备删除时调用，结束时由 close_outputs 完成。"""
+        for f in (self.txt_log, self.probe_ids_log):
+            if f is not None:
+                f.flush()
+
+    def close_outputs(self):
+        for f in (self.pcap_writer, self.txt_log, self.probe_ids_log):
+            if f is not None:
+                f.close()
+        self.pcap_writer = self.txt_log = self.probe_ids_log = None
 
     def add_device(self, device: Device) -> None:
         # 仅多设备时体现“流动性”；单设备忽略移动性倍率
@@ -227,20 +280,46 @@ class Simulator:
                 device.speed *= mul
             except Exception:
                 pass
+        device.attach_motion(self.motion)
         self.devices_list.append(device)
         self.next_id_device += 1
         self.number_of_devices_available += 1
-        print(f"[{datetime.now()}] 设备 {device.id}（{device.vendor} {device.model}，speed≈{device.speed:.2f} m/s）已创建。")
+        print(f"[{fmt_time(device.time_phase_changed)}] 设备 {device.id}（{device.vendor} {device.model}，speed≈{device.speed:.2f} m/s）已创建。")
+
+    def sample(self, model, phase, name, k=1):
+        """
+        从 DeviceRates 中名为 name 的离散分布（prob_int_burst / prob_between_bursts / jitter / burst_lengths）
+        一次抽取 k 个值，返回 list；分布不存在时返回 None。
+        取值与累积概率表按 (model, phase, name) 缓存，之后每次抽样只是一次 searchsorted。
+        """
+        key = (model, phase, name)
+        try:
+            entry = self._sampler_cache[key]
+        except KeyError:
+            getter = getattr(self.device_rates, "get_" + name)
+            dist = getter(model) if phase is None else getter(model, phase)
+            entry = None
+            if dist:
+                weights = np.fromiter(dist.values(), dtype=np.float64, count=len(dist))
+                total = weights.sum()
+                if total > 0:
+                    cdf = np.cumsum(weights) / total
+                    cdf[-1] = 1.0
+                    entry = (np.fromiter(dist.keys(), dtype=np.float64, count=len(dist)), cdf)
+            self._sampler_cache[key] = entry
+        if entry is None:
+            return None
+        values, cdf = entry
+        return values[np.searchsorted(cdf, self.rng.random(k), side="right")].tolist()
 
     def new_burst(self, time_stamp, device):
-        int_pkt_time = self.device_rates.get_prob_int_burst(device.model, device.phase)
-        int_pkt_time = {k: v * self.scene_params.get("burst_interval_multiplier", 1.0) for k, v in int_pkt_time.items()} if int_pkt_time else {}
-        between = self.device_rates.get_prob_between_bursts(device.model, device.phase)
-        burst_lens = self.device_rates.get_burst_lengths(device.model)
-
-        int_pkt_time_chosen = random.choices(list(int_pkt_time.keys()), weights=list(int_pkt_time.values()), k=1)[0] if int_pkt_time else 0.02
-        burst_rate_chosen = random.choices(list(between.keys()), weights=list(between.values()), k=1)[0] if between else 2.0
-        burst_length_chosen = int(random.choices(list(burst_lens.keys()), weights=list(burst_lens.values()), k=1)[0]) if burst_lens else 2
+        # burst_interval_multiplier 作用于抽中的包间隔本身（按原分布抽样后再缩放）
+        int_pkt_time_chosen = (self.sample(device.model, device.phase, "prob_int_burst") or [0.02])[0]
+        int_pkt_time_chosen *= self.burst_interval_multiplier
+        burst_rate_chosen = (self.sample(device.model, device.phase, "prob_between_bursts") or [2.0])[0]
+        burst_length_chosen = int((self.sample(device.model, None, "burst_lengths") or [2])[0])
+        # 整个 burst 的逐包抖动一次抽好
+        jitters = np.asarray(self.sample(device.model, device.phase, "jitter", burst_length_chosen) or np.zeros(burst_length_chosen))
 
         # === 按 mac_rotation_mode 决定本次 burst 是否换 MAC ===
         mode = getattr(device, "mac_rotation_mode", "per_burst")
@@ -251,22 +330,12 @@ class Simulator:
         else:  # "interval"
             # 初始化倒计时
             if not hasattr(device, "_mac_change_left") or device._mac_change_left is None:
-                dist = self.device_rates.get_prob_between_bursts(device.model, device.phase)
-                if dist:
-                    ks, ws = list(dist.keys()), list(dist.values())
-                    device._mac_change_left = random.choices(ks, weights=ws, k=1)[0]
-                else:
-                    device._mac_change_left = 30.0
+                device._mac_change_left = (self.sample(device.model, device.phase, "prob_between_bursts") or [30.0])[0]
             # 是否到更换点
             if device._mac_change_left <= 0:
                 device.force_mac_change = True
                 # 抽下一个间隔
-                dist = self.device_rates.get_prob_between_bursts(device.model, device.phase)
-                if dist:
-                    ks, ws = list(dist.keys()), list(dist.values())
-                    device._mac_change_left = random.choices(ks, weights=ws, k=1)[0]
-                else:
-                    device._mac_change_left = 30.0
+                device._mac_change_left = (self.sample(device.model, device.phase, "prob_between_bursts") or [30.0])[0]
             else:
                 device.force_mac_change = False
 
@@ -290,42 +359,67 @@ class Simulator:
             burst_duration = max(0.0, (burst_length_chosen - 1) * float(int_pkt_time_chosen))
             device._mac_change_left -= (burst_duration + float(burst_rate_chosen))
 
-        return int_pkt_time_chosen, burst_rate_chosen, burst_length_chosen, packets
+        return int_pkt_time_chosen, burst_rate_chosen, burst_length_chosen, packets, jitters, self.channel_outcomes(device, burst_length_chosen)
+
+    def channel_outcomes(self, device, n):
+        """
+        一次算出一个 burst 内 n 个包能否成功送达（bool 数组）：场景干扰与物理层信道都按整段批量抽样。
+        同一 burst 持续时间很短，距离与功率按 burst 开始时的设备状态计算。
+        """
+        # 与 AP 的距离（AP 位于 (50,50)）
+        x, y = device.position
+        distance = math.hypot(x - 50.0, y - 50.0)
+        # 设备功率与场景干扰对物理层的影响
+        env = self.scene_params.get("env_factor", 1.0) * (device.power_level / 20.0)
+        interfered = self.rng.random(n) < self.scene_params.get("interference_prob", 0.0)
+        return ~interfered & self.phy.simulate_channel_batch(distance, env_factor=env, n=n)
 
 
-TIME_OFFSET = timedelta(seconds=0.001)
+TIME_OFFSET = 0.001  # 秒
 
-def generate_phase(device, device_rates, scene_params) -> (int, float):
+
+def fmt_time(t: float) -> str:
+    """仿真时间（Unix 秒）只在写日志/打印时转成可读时间，格式与 str(datetime) 相同。"""
+    return str(datetime.fromtimestamp(t))
+
+
+# 相位转移的累积概率表：行是当前相位，第 j 列是 P(新相位 <= j)；
+# 0 -> {1: 0.2, 2: 0.8}，1 -> {0: 0.9, 2: 0.1}，2 -> 0
+_PHASE_CDF = (
+    (0.0, 0.2, 1.0),
+    (0.9, 0.9, 1.0),
+    (1.0, 1.0, 1.0),
+)
+# 多设备场景新建设备的初始相位分布 {0: 0.35, 1: 0.15, 2: 0.50}
+_INITIAL_PHASE_CDF = (0.35, 0.5, 1.0)
+
+
+def generate_phase(device, simulator) -> (int, float):
     current_phase = device.phase
-    dwell = device_rates.get_state_dwell(device.model, current_phase)
+    dwell = simulator.sample(device.model, current_phase, "state_dwell")
     if dwell:
-        dwell_times = list(dwell.keys())
-        weights = list(dwell.values())
-        delay = random.choices(dwell_times, weights=weights, k=1)[0]
+        delay = dwell[0]
     else:
         if current_phase == 0:
-            delay = random.expovariate(1 / (60 * 5))
+            delay = simulator.pyrng.expovariate(1 / (60 * 5))
         elif current_phase == 1:
-            delay = random.expovariate(1 / 30)
+            delay = simulator.pyrng.expovariate(1 / 30)
         elif current_phase == 2:
-            delay = random.expovariate(1 / (60 * 3))
+            delay = simulator.pyrng.expovariate(1 / (60 * 3))
         else:
             delay = 60
-    delay *= scene_params.get("dwell_multiplier", 1.0)
+    delay *= simulator.scene_params.get("dwell_multiplier", 1.0)
 
-    if current_phase == 0:
-        new_phase = np.random.choice([1, 2], p=[0.2, 0.8])
-    elif current_phase == 1:
-        new_phase = np.random.choice([0, 2], p=[0.9, 0.1])
-    elif current_phase == 2:
-        new_phase = 0
+    # 一次 random() + 二分查找代替小数组上的 np.random.choice；未知相位回到 0
+    if 0 <= current_phase < len(_PHASE_CDF):
+        new_phase = bisect.bisect_right(_PHASE_CDF[current_phase], simulator.pyrng.random())
     else:
         new_phase = 0
     return new_phase, delay
 
 
 class Event:
-    def __init__(self, start_time: datetime, job_type: str, device=None, phase: int = None, vendor: str = None, model: str = None, packet=None, burst_end: bool = None):
+    def __init__(self, start_time: float, job_type: str, device=None, phase: int = None, vendor: str = None, model: str = None, packet=None, burst_end: bool = None, channel_ok: bool = None):
         self.start_time = start_time
         self.job_type = job_type
         self.device = device
@@ -334,50 +428,67 @@ class Event:
         self.model = model
         self.packet = packet
         self.burst_end = burst_end
+        self.channel_ok = channel_ok  # send_packet：创建 burst 时已批量算好的信道结果
+        self.epoch = None             # 入队时的纪元，见 push_event / is_stale_event
 
 
-def add_event(sim, event: Event) -> timedelta:
-    # 既有 OS 抖动
-    os_delay = timedelta(milliseconds=random.uniform(5, 20))
+def device_queue_delay(device) -> float:
+    """设备发送帧的期望排队时延（秒），服务率取 processing_delay 的倒数。"""
+    service_rate = 1.0 / max(device.processing_delay, 1e-4)
+    return simulate_queue_delay(device.queue_length, service_rate=service_rate)
+
+
+def push_event(sim, event: Event) -> None:
+    # 记下入队时的纪元：纪元在出队前变化则事件已作废，出堆时直接丢弃，不必重建整个堆
+    if event.job_type == "create_device":
+        event.epoch = sim._creation_epoch
+    elif event.job_type in ("create_burst", "send_packet"):
+        event.epoch = event.device._phase_epoch
+    # 同一时刻 send_packet 排在其他事件之后；入队序号保证同键事件先进先出
+    heapq.heappush(sim.events_list, (event.start_time, 1 if event.job_type == "send_packet" else 0, next(sim._event_seq), event))
+
+
+def add_event(sim, event: Event) -> float:
+    # 既有 OS 抖动（秒）
+    os_delay = sim.pyrng.uniform(0.005, 0.020)
     event.start_time += os_delay
 
     # 队列延迟（仅对发送帧）
-    q_delay = timedelta(0)
+    q_delay = 0.0
     if event.job_type == "send_packet" and getattr(event, "device", None) is not None:
-        service_rate = 1.0 / max(event.device.processing_delay, 1e-4)
-        q_sec = simulate_queue_delay(event.device.queue_length, service_rate=service_rate)
-        q_delay = timedelta(seconds=q_sec)
+        q_delay = device_queue_delay(event.device)
         event.start_time += q_delay
 
-    sim.events_list.append(event)
-    sim.events_list.sort(key=lambda e: (e.start_time, 1 if e.job_type == "send_packet" else 0))
+    push_event(sim, event)
     return os_delay + q_delay
 
 
-def clean_events_after_change_phase(sim, device):
-    sim.events_list = [
-        e for e in sim.events_list
-        if e.job_type == "create_device" or (e.device.id != device.id or (e.device.id == device.id and e.job_type not in ["create_burst", "send_packet"]))
-    ]
-
-
-def clean_events_after_delete_device(sim, device_id):
-    sim.events_list = [e for e in sim.events_list if e.device is not None and e.device.id != device_id]
+def is_stale_event(sim, event: Event) -> bool:
+    """
+    惰性失效：
+    - 设备切换相位后，此前排队的 create_burst / send_packet 作废（相位纪元已变）；
+    - 设备删除后，它的所有事件作废；同时此前排队的 create_device 也作废（与原先按列表过滤的行为一致）。
+    """
+    if event.job_type == "create_device":
+        return event.epoch != sim._creation_epoch
+    if not event.device._alive:
+        return True
+    if event.job_type in ("create_burst", "send_packet"):
+        return event.epoch != event.device._phase_epoch
+    return False
 
 
 def change_phase(simulator, device, phase, time_stamp):
     device.change_phase(phase, time_stamp)
-    with open(simulator.out_file + '.txt', 'a') as f:
-        f.write(f"Device {device.id} ({device.vendor} {device.model}) changed phase to {phase} at {time_stamp}\n")
-    print(f"[{time_stamp}] 设备 {device.id} 状态切换为 {phase}。")
+    simulator.txt_log.write(f"Device {device.id} ({device.vendor} {device.model}) changed phase to {phase} at {fmt_time(time_stamp)}\n")
+    print(f"[{fmt_time(time_stamp)}] 设备 {device.id} 状态切换为 {phase}。")
 
 
 def delete_device(simulator, device, time_stamp):
     device.time_phase_changed = time_stamp
     simulator.number_of_devices_available -= 1
-    with open(simulator.out_file + '.txt', 'a') as f:
-        f.write(f"Device {device.id} ({device.vendor} {device.model}) deleted at {time_stamp}\n")
-    print(f"[{time_stamp}] 设备 {device.id} 已删除。")
+    simulator.txt_log.write(f"Device {device.id} ({device.vendor} {device.model}) deleted at {fmt_time(time_stamp)}\n")
+    print(f"[{fmt_time(time_stamp)}] 设备 {device.id} 已删除。")
 
 
 def create_device(simulator, time_stamp, phase, vendor, model):
@@ -391,182 +502,195 @@ def create_device(simulator, time_stamp, phase, vendor, model):
 
     # === 初始化“按间隔换 MAC”的倒计时（秒） ===
     if getattr(device, "mac_rotation_mode", "per_burst") == "interval":
-        dist = simulator.device_rates.get_prob_between_bursts(device.model, device.phase)
-        if dist:
-            ks, ws = list(dist.keys()), list(dist.values())
-            device._mac_change_left = random.choices(ks, weights=ws, k=1)[0]
-        else:
-            device._mac_change_left = 30.0
+        device._mac_change_left = (simulator.sample(device.model, device.phase, "prob_between_bursts") or [30.0])[0]
     else:
         device._mac_change_left = None
 
     simulator.add_device(device)
-    with open(simulator.out_file + '.txt', 'a') as f:
-        f.write(f"Device {device.id} ({device.vendor} {device.model}) created at {time_stamp}\n")
+    simulator.txt_log.write(f"Device {device.id} ({device.vendor} {device.model}) created at {fmt_time(time_stamp)}\n")
     return device
 
 
-def handle_event(event: Event, simulator):
-    if event.job_type == "change_phase":
-        # 多设备 & 单设备（可切换）都允许自动状态切换
-        if simulator.dataset_type in ("multi", "single_switch"):
-            change_phase(simulator, event.device, event.phase, event.start_time)
-            new_phase, delay = generate_phase(event.device, simulator.device_rates, simulator.scene_params)
-            add_event(simulator, Event(event.start_time + timedelta(seconds=delay), "change_phase", device=event.device, phase=new_phase))
-            clean_events_after_change_phase(simulator, event.device)
-            if simulator.device_rates.is_sending_probe(event.device.model, event.device.phase):
-                add_event(simulator, Event(event.start_time, "create_burst", device=event.device))
-        else:
-            # 单设备（不可切换）：不改变状态，仅按固定状态发包
-            if simulator.device_rates.is_sending_probe(event.device.model, event.device.phase):
-                add_event(simulator, Event(event.start_time, "create_burst", device=event.device))
-
-    elif event.job_type == "create_burst":
+def _handle_change_phase(event: Event, simulator):
+    # 多设备 & 单设备（可切换）都允许自动状态切换
+    if simulator.dataset_type in ("multi", "single_switch"):
+        change_phase(simulator, event.device, event.phase, event.start_time)
+        new_phase, delay = generate_phase(event.device, simulator)
+        add_event(simulator, Event(event.start_time + delay, "change_phase", device=event.device, phase=new_phase))
+        event.device._phase_epoch += 1   # 作废该设备已排队的 burst / 发包事件
         if simulator.device_rates.is_sending_probe(event.device.model, event.device.phase):
-            int_pkt_time, burst_rate, burst_len, packets = simulator.new_burst(event.start_time, event.device)
-            counter_sum = timedelta(seconds=0.0)
-            for i in range(int(burst_len)):
-                jitter_dist = simulator.device_rates.get_jitter(event.device.model, event.device.phase)
-                jitter_sample = random.choices(list(jitter_dist.keys()), weights=list(jitter_dist.values()), k=1)[0] if jitter_dist else 0
-                event_time = event.start_time + i * timedelta(seconds=int_pkt_time) + counter_sum + timedelta(seconds=jitter_sample)
-                counter = add_event(simulator, Event(event_time, "send_packet", device=event.device, packet=packets[i], burst_end=(i == burst_len - 1)))
-                counter_sum += counter
-                # 回写帧时间戳（叠加调度延迟与抖动）
-                packets[i].time = (datetime.fromtimestamp(packets[i].time) + counter_sum + timedelta(seconds=jitter_sample)).timestamp()
-            add_event(simulator, Event(
-                event.start_time + (burst_len - 1) * timedelta(seconds=int_pkt_time) + counter_sum + timedelta(seconds=burst_rate),
-                "create_burst",
-                device=event.device
-            ))
-
-    elif event.job_type == "send_packet":
-        # 与 AP 的距离（AP 位于 (50,50)）
-        distance = np.linalg.norm(np.array(event.device.position) - np.array((50, 50)))
+            add_event(simulator, Event(event.start_time, "create_burst", device=event.device))
+    else:
+        # 单设备（不可切换）：不改变状态，仅按固定状态发包
+        if simulator.device_rates.is_sending_probe(event.device.model, event.device.phase):
+            add_event(simulator, Event(event.start_time, "create_burst", device=event.device))
+
+
+def _handle_create_burst(event: Event, simulator):
+    if simulator.device_rates.is_sending_probe(event.device.model, event.device.phase):
+        int_pkt_time, burst_rate, burst_len, packets, jitters, channel_ok = simulator.new_burst(event.start_time, event.device)
+        n = int(burst_len)
+        # 设备处理耗时计入仿真时间线：整个 burst 从 start_time + processing_delay 开始
+        burst_start = event.start_time + event.device.processing_delay
+        # 第 i 帧的发送时刻 = 名义时刻 + 前 i 帧累积的调度延迟（OS 抖动 + 排队）+ 本帧抖动，整段一次算出
+        sched_sum = np.cumsum(simulator.rng.uniform(0.005, 0.020, n) + device_queue_delay(event.device))
+        event_times = burst_start + np.arange(n) * int_pkt_time + sched_sum + jitters[:n]
+        for i, (t, pkt, ok) in enumerate(zip(event_times.tolist(), packets, channel_ok.tolist())):
+            pkt.time = t   # 回写帧时间戳（叠加调度延迟与抖动）
+            push_event(simulator, Event(t, "send_packet", device=event.device, packet=pkt, burst_end=(i == n - 1), channel_ok=ok))
+        counter_sum = float(sched_sum[-1]) if n else 0.0
+        add_event(simulator, Event(
+            burst_start + (n - 1) * int_pkt_time + counter_sum + burst_rate,
+            "create_burst",
+            device=event.device
+        ))
+
+
+def _handle_send_packet(event: Event, simulator):
+    channel_success = event.channel_ok
+    if channel_success is None:
+        channel_success = bool(simulator.channel_outcomes(event.device, 1)[0])
+
+    if channel_success:
+        simulator.pcap_writer.write(event.packet)
+        # 抽样质检
+        if simulator.qa_enabled and simulator.pyrng.random() < simulator.qa_rate:
+            c = capture_parsing.capture_frame(event.packet, simulator.pyrng)
+            capture_parsing.parse_captured_frame(c)
+        simulator.probe_ids_log.write(f"{event.device.id}\n")
+        event.device.number_packets_sent += 1
+        print(f"[{fmt_time(event.start_time)}] 设备 {event.device.id} 发送数据包（成功）。")
+    else:
+        print(f"[{fmt_time(event.start_time)}] 设备 {event.device.id} 数据包因信道条件不佳而丢失。")
+
+    if event.burst_end:
+        event.device.number_bursts_sent += 1
+
+
+def _handle_create_device(event: Event, simulator):
+    if simulator.dataset_type == "multi":
+        phase = bisect.bisect_right(_INITIAL_PHASE_CDF, simulator.pyrng.random())
+        device = create_device(simulator, event.start_time, phase, event.vendor, event.model)
+        permanence_time = simulator.avg_permanence_time * simulator.scene_params["creation_interval_multiplier"]
+        add_event(simulator, Event(event.start_time + permanence_time, "delete_device", device=device))
+        new_phase, delay = generate_phase(device, simulator)
+        add_event(simulator, Event(event.start_time + delay, "change_phase", device=device, phase=new_phase))
+        if simulator.device_rates.is_sending_probe(device.model, device.phase):
+            add_event(simulator, Event(event.start_time, "create_burst", device=device))
+        next_creation = simulator.avg_permanence_time / 2 * simulator.scene_params["creation_interval_multiplier"]
+        vendor, model, _ = simulator.device_rates.get_random_device()
+        add_event(simulator, Event(event.start_time + next_creation, "create_device", vendor=vendor, model=model))
+
+    elif simulator.dataset_type == "single_switch":
+        # 单设备（可切换）：只输入开始状态，后续自动切换
+        start_phase = simulator.scene_params.get("single_phase", 2)
+        device = create_device(simulator, event.start_time, start_phase, event.vendor, event.model)
+        print(f"单设备（可切换）已选择：{device.vendor} / {device.model}")
+        new_phase, delay = generate_phase(device, simulator)
+        add_event(simulator, Event(event.start_time + delay, "change_phase", device=device, phase=new_phase))
+        if simulator.device_rates.is_sending_probe(device.model, device.phase):
+            add_event(simulator, Event(event.start_time, "create_burst", device=device))
 
-        # 设备功率与场景干扰对物理层的影响
-        base_env = simulator.scene_params.get("env_factor", 1.0)
-        env = base_env * (event.device.power_level / 20.0)
+    else:
+        # 单设备（不可切换）：固定相位
+        fixed_phase = simulator.scene_params.get("single_phase", 0)
+        device = create_device(simulator, event.start_time, fixed_phase, event.vendor, event.model)
+        print(f"单设备（不可切换）已选择：{device.vendor} / {device.model}，固定相位={fixed_phase}")
+        if simulator.device_rates.is_sending_probe(device.model, device.phase):
+            add_event(simulator, Event(event.start_time, "create_burst", device=device))
 
-        if random.random() < simulator.scene_params.get("interference_prob", 0.0):
-            channel_success = False
-        else:
-            channel_success = phy.simulate_channel(distance, env_factor=env)
-
-        if channel_success:
-            wrpcap(simulator.out_file + ".pcap", event.packet, append=True)
-            # 抽样质检
-            if random.random() < simulator.scene_params.get("qa_sample_rate", 0.0):
-                c = capture_parsing.capture_frame(event.packet)
-                capture_parsing.parse_captured_frame(c)
-            with open(simulator.out_file + '_probe_ids.txt', 'a') as f:
-                f.write(f"{event.device.id}\n")
-            event.device.number_packets_sent += 1
-            print(f"[{event.start_time}] 设备 {event.device.id} 发送数据包（成功）。")
-        else:
-            print(f"[{event.start_time}] 设备 {event.device.id} 数据包因信道条件不佳而丢失。")
-
-        if event.burst_end:
-            event.device.number_bursts_sent += 1
-
-    elif event.job_type == "create_device":
-        if simulator.dataset_type == "multi":
-            phase = np.random.choice([0, 1, 2], p=[0.35, 0.15, 0.50])
-            device = create_device(simulator, event.start_time, phase, event.vendor, event.model)
-            permanence_time = simulator.avg_permanence_time * simulator.scene_params["creation_interval_multiplier"]
-            add_event(simulator, Event(event.start_time + timedelta(seconds=permanence_time), "delete_device", device=device))
-            new_phase, delay = generate_phase(device, simulator.device_rates, simulator.scene_params)
-            add_event(simulator, Event(event.start_time + timedelta(seconds=delay), "change_phase", device=device, phase=new_phase))
-            if simulator.device_rates.is_sending_probe(device.model, device.phase):
-                add_event(simulator, Event(event.start_time, "create_burst", device=device))
-            next_creation = simulator.avg_permanence_time / 2 * simulator.scene_params["creation_interval_multiplier"]
-            vendor, model, _ = simulator.device_rates.get_random_device()
-            add_event(simulator, Event(event.start_time + timedelta(seconds=next_creation), "create_device", vendor=vendor, model=model))
-
-        elif simulator.dataset_type == "single_switch":
-            # 单设备（可切换）：只输入开始状态，后续自动切换
-            start_phase = simulator.scene_params.get("single_phase", 2)
-            device = create_device(simulator, event.start_time, start_phase, event.vendor, event.model)
-            print(f"单设备（可切换）已选择：{device.vendor} / {device.model}")
-            new_phase, delay = generate_phase(device, simulator.device_rates, simulator.scene_params)
-            add_event(simulator, Event(event.start_time + timedelta(seconds=delay), "change_phase", device=device, phase=new_phase))
-            if simulator.device_rates.is_sending_probe(device.model, device.phase):
-                add_event(simulator, Event(event.start_time, "create_burst", device=device))
 
-        else:
-            # 单设备（不可切换）：固定相位
-            fixed_phase = simulator.scene_params.get("single_phase", 0)
-            device = create_device(simulator, event.start_time, fixed_phase, event.vendor, event.model)
-            print(f"单设备（不可切换）已选择：{device.vendor} / {device.model}，固定相位={fixed_phase}")
-            if simulator.device_rates.is_sending_probe(device.model, device.phase):
-                add_event(simulator, Event(event.start_time, "create_burst", device=device))
+def _handle_delete_device(event: Event, simulator):
+    delete_device(simulator, event.device, event.start_time)
+    simulator.flush_outputs()
+    event.device._alive = False
+    simulator._creation_epoch += 1
+
+
+# 按 job_type 分派到各自的处理函数（一次字典查找代替逐个字符串比较）
+_EVENT_HANDLERS = {
+    "change_phase": _handle_change_phase,
+    "create_burst": _handle_create_burst,
+    "send_packet": _handle_send_packet,
+    "create_device": _handle_create_device,
+    "delete_device": _handle_delete_device,
+}
 
-    elif event.job_type == "delete_device":
-        delete_device(simulator, event.device, event.start_time)
-        clean_events_after_delete_device(simulator, event.device.id)
+
+def handle_event(event: Event, simulator):
+    handler = _EVENT_HANDLERS.get(event.job_type)
+    if handler is not None:
+        handler(event, simulator)
 
 
 def run_simulation(sim_out_file, dataset_type, sim_duration_minutes, device_count, scene_params):
     SIM_DURATION_MINUTES = sim_duration_minutes
-    sim_duration = timedelta(minutes=SIM_DURATION_MINUTES)
+    sim_duration = SIM_DURATION_MINUTES * 60.0   # 秒
     sim = Simulator(sim_out_file, avg_permanence_time=15 * 60, scene_params=scene_params, dataset_type=dataset_type)
 
-    # 清空旧文件
-    for ext in ['.txt', '.pcap', '_probe_ids.txt']:
-        open(sim.out_file + ext, 'w').close()
-
-    start_time = datetime.now()
-    print(f"Simulation start time: {start_time}")
-
-    # 添加初始设备创建事件
-    if dataset_type == "multi":
-        for _ in range(device_count):
-            vendor, model, _ = sim.device_rates.get_random_device()
-            add_event(sim, Event(start_time, "create_device", vendor=vendor, model=model))
-    else:
-        vendor_inp = scene_params.get("single_vendor", "").strip()
-        model_inp = scene_params.get("single_model", "").strip()
-        if vendor_inp:
-            vendor, model, _ = _pick_model_by_vendor(sim.device_rates, vendor_inp, model_inp if model_inp else None)
+    # 清空旧文件并打开常驻句柄；仿真结束（含异常）时统一关闭
+    sim.open_outputs()
+    try:
+        # 仿真时间统一用 float Unix 秒，以真实开始时刻为零点；实时模式用单调时钟对齐节奏
+        start_time = time.time()
+        mono_start = time.monotonic()
+        sim_now = start_time
+        print(f"Simulation start time: {fmt_time(start_time)}")
+
+        # 添加初始设备创建事件
+        if dataset_type == "multi":
+            for _ in range(device_count):
+                vendor, model, _ = sim.device_rates.get_random_device()
+                add_event(sim, Event(start_time, "create_device", vendor=vendor, model=model))
         else:
-            vendor, model, _ = sim.device_rates.get_random_device()
-        print(f"单设备已选择（可能为随机）：{vendor} / {model}")
-        add_event(sim, Event(start_time, "create_device", vendor=vendor, model=model))
-
-    with open(sim.out_file + '.txt', 'a') as f:
-        f.write('+++++++++++ Simulation start +++++++++++\n')
-        f.write(f'Initial time (real and simulated): {start_time}\n')
-
-    # 主事件循环
-    while sim.events_list:
-        now = datetime.now()
-        next_event = sim.events_list[0]
-        if next_event.start_time > now:
-            sleep_time = (next_event.start_time - now).total_seconds()
-            time.sleep(sleep_time)
-
-        evt = sim.events_list.pop(0)
-        time.sleep(random.uniform(0.005, 0.02))
-
-        # 多设备：体现移动；单设备：移动性开关已在 add_device 中忽略倍率
-        for dev in sim.devices_list:
-            dev.update_position(0.1)
+            vendor_inp = scene_params.get("single_vendor", "").strip()
+            model_inp = scene_params.get("single_model", "").strip()
+            if vendor_inp:
+                vendor, model, _ = _pick_model_by_vendor(sim.device_rates, vendor_inp, model_inp if model_inp else None, sim.pyrng)
+            else:
+                vendor, model, _ = sim.device_rates.get_random_device()
+            print(f"单设备已选择（可能为随机）：{vendor} / {model}")
+            add_event(sim, Event(start_time, "create_device", vendor=vendor, model=model))
 
-        handle_event(evt, sim)
-        if evt.start_time >= start_time + sim_duration:
-            break
+        sim.txt_log.write('+++++++++++ Simulation start +++++++++++\n')
+        sim.txt_log.write(f'Initial time (real and simulated): {fmt_time(start_time)}\n')
+
+        # 主事件循环
+        # 虚拟时间：直接把 sim_now 推进到下一个事件的时刻；实时模式才等墙钟追上事件时间
+        while sim.events_list:
+            evt = heapq.heappop(sim.events_list)[3]
+            if is_stale_event(sim, evt):
+                continue
+            if sim.realtime:
+                wait = (evt.start_time - start_time) - (time.monotonic() - mono_start)
+                if wait > 0:
+                    time.sleep(wait)
+
+            sim_now = evt.start_time
+            if sim.realtime and not scene_params.get("avoid_bg_sleep", False):
+                time.sleep(sim.pyrng.uniform(0.005, 0.02))
+
+            # 多设备：体现移动；单设备：移动性开关已在 add_device 中忽略倍率
+            sim.motion.update(0.1)
+
+            handle_event(evt, sim)
+            if sim_now >= start_time + sim_duration:
+                break
+    finally:
+        sim.close_outputs()
 
     print("Simulation finished.")
     for dev in sim.devices_list:
         dev.print_information(sim.out_file)
         dev.print_statistics(sim.out_file)
 
-    end_time = datetime.now()
+    end_time = time.time()
     with open(sim.out_file + '.txt', 'a') as f:
         f.write('\n+++++++++++ Simulation end +++++++++++\n')
-        f.write(f'End time (real): {end_time}\n')
-        f.write(f'End time (simulated): {evt.start_time}\n')
-        f.write(f'Time ratio (simulated/real): {round((evt.start_time - start_time) / (end_time - start_time), 2)}\n')
-        total_MACs = sum(len(d.mac_address) for d in sim.devices_list)
+        f.write(f'End time (real): {fmt_time(end_time)}\n')
+        f.write(f'End time (simulated): {fmt_time(sim_now)}\n')
+        f.write(f'Time ratio (simulated/real): {round((sim_now - start_time) / (end_time - start_time), 2)}\n')
+        total_MACs = sum(d.mac_count for d in sim.devices_list)
         total_packets = sum(d.number_packets_sent for d in sim.devices_list)
         f.write(f'\nTotal number of different MAC addresses: {total_MACs}\n')
         f.write(f'Total number of packets sent: {total_packets}\n')
@@ -578,23 +702,33 @@ def run_simulation(sim_out_file, dataset_type, sim_duration_minutes, device_coun
         writer = csv.writer(f)
         writer.writerow(['mac_address', 'device_name', 'device_id'])
         for dev in sim.devices_list:
-            macs = dev.mac_address if isinstance(dev.mac_address, (list, tuple)) else [dev.mac_address]
-            for mac in macs:
+            for mac in dev.mac_address:
                 writer.writerow([mac, f"{dev.vendor} {dev.model}", dev.id])
     print(f"设备信息已保存至：{csv_file}")
 
 
-def main():
+def main(realtime=False, seed=None):
+    # 交互配置中随机生成的设备数也随 seed 复现
+    config_rng = random.Random(seed)
     for run in range(1, dataset_count + 1):
-        dataset_type, sim_duration_minutes, device_count, scene_params = generate_dataset_config(run)
+        dataset_type, sim_duration_minutes, device_count, scene_params = generate_dataset_config(run, config_rng)
+        scene_params["realtime"] = realtime
+        # 多次运行各用不同但可复现的种子
+        scene_params["seed"] = None if seed is None else seed + run - 1
         out_file = f"out_file_run_{run}"
         print(f"\n----- Starting simulation run {run} -----")
         run_simulation(out_file, dataset_type, sim_duration_minutes, device_count, scene_params)
-        time.sleep(5)
+        if realtime:
+            time.sleep(5)
     print("All simulation runs completed.")
 
 
 if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="probe request 传输仿真")
+    ap.add_argument("--realtime", action="store_true", help="按墙钟节奏运行（逐事件 sleep）；默认以虚拟时间尽快跑完")
+    ap.add_argument("--seed", type=int, default=None, help="模拟器随机种子（第 k 次运行使用 seed+k-1），配置文件 1.txt/2.txt 相同时整次仿真可复现；缺省为不可复现的随机种子")
+    args = ap.parse_args()
+
     # 放到 __main__，避免 import 触发交互
     dataset_count_input = input("请输入生成数据集数量（正整数）：")
     try:
@@ -602,4 +736,4 @@ if __name__ == "__main__":
     except Exception:
         print("输入有误，默认生成1个数据集")
         dataset_count = 1
-    main()
+    main(realtime=args.realtime, seed=args.seed)
@@ -1,30 +1,61 @@
 # phy_layer.py
 import math
-import random
 import numpy as np
 
+# numba 为可选依赖：可用时把批量信道判决编译成机器码，否则用 NumPy 向量表达式
+try:
+    from numba import njit
+except Exception:
+    njit = None
+
+
+def _phy_success_kernel(distance, env_factor, tx_power, fspl_const, threshold, rayleigh, shadow):
+    """
+    批量信道判决内核：路径损耗（fspl_const 为与距离无关的 20*log10(f)-27.55）对整段只算一次，逐包叠加衰落（rayleigh 为正值，表示损耗）与阴影，
+    乘环境因子后与门限比较，返回 bool 数组。随机数在外部抽好传入
+    """
+    if distance <= 0:
+        distance = 0.001
+    base = tx_power - (20.0 * math.log10(distance) + fspl_const)
+    n = rayleigh.shape[0]
+    out = np.empty(n, dtype=np.bool_)
+    for i in range(n):
+        out[i] = (base - rayleigh[i] + shadow[i]) * env_factor > threshold
+    return out
+
+
+# 显式签名：导入时即编译（命中磁盘缓存时只是加载），第一个 burst 不再承担编译开销
+_PHY_SUCCESS_SIG = "b1[:](f8, f8, f8, f8, f8, f8[:], f8[:])"
+_phy_success_jit = (njit(_PHY_SUCCESS_SIG, cache=True, fastmath=True)(_phy_success_kernel)
+                    if njit is not None else None)
+
+
 class PhysicalLayer:
-    def __init__(self, tx_power=20, frequency=2400, env='urban'):
+    def __init__(self, tx_power=20, frequency=2400, env='urban', rng=None):
         self.tx_power = tx_power  # 发射功率，单位 dBm
         self.frequency = frequency  # 频率，单位 MHz
+        # FSPL 中只与频率有关的部分，实例内频率固定，预先算好
+        self._fspl_const = 20 * math.log10(self.frequency) - 27.55
         self.env = env  # 环境类型，可用于后续调整
+        # 衰落/阴影的随机源（numpy Generator）；模拟器传入自己的 rng 以便按种子复现
+        self.rng = rng if rng is not None else np.random.default_rng()
 
     def free_space_path_loss(self, distance):
         # 自由空间路径损耗公式（单位 dB）
         # FSPL = 20*log10(d) + 20*log10(f) - 27.55, d单位米，f单位MHz
         if distance <= 0:
             distance = 0.001
-        loss = 20 * math.log10(distance) + 20 * math.log10(self.frequency) - 27.55
+        loss = 20 * math.log10(distance) + self._fspl_const
         return loss
 
     def rayleigh_fading(self):
         # Rayleigh 衰落模拟，单位 dB（负值表示衰落）
-        fading = np.random.rayleigh(scale=2.0)
+        fading = self.rng.rayleigh(scale=2.0)
         return -fading
 
     def shadowing(self):
         # 阴影衰落模拟，服从正态分布（均值0，标准差3 dB）
-        return random.gauss(0, 3)
+        return self.rng.normal(0, 3)
 
     def compute_received_power(self, distance):
         # 计算接收功率 = tx_power - path_loss + fading + shadowing
@@ -43,3 +74,16 @@ class PhysicalLayer:
             return True
         else:
             return False
+
+    def simulate_channel_batch(self, distance, env_factor=1.0, n=1):
+        # 批量版 simulate_channel：同一 burst 的 n 个包共享距离与环境因子，
+        # 路径损耗只算一次，衰落与阴影一次抽 n 个，返回 bool 数组
+        rayleigh = self.rng.rayleigh(scale=2.0, size=n)
+        shadow = self.rng.normal(0, 3, size=n)
+        noise_floor = -90  # dBm
+        if _phy_success_jit is not None:
+            return _phy_success_jit(float(distance), float(env_factor), float(self.tx_power), self._fspl_const,
+                                    noise_floor + 10.0, rayleigh, shadow)
+        loss = self.free_space_path_loss(distance)
+        received_power = (self.tx_power - loss - rayleigh + shadow) * env_factor
+        return received_power > noise_floor + 10
@@ -1,18 +1,49 @@
 import numpy as np
 import math
-from collections import Counter
-from scapy.all import rdpcap, Dot11
+import mmap
+import os
+import struct
+from array import array
+from functools import lru_cache
+from scapy.all import RawPcapReader, Dot11, conf
+
+# dpkt 为可选依赖：可用时按原始字节流式解析 pcap，否则退回 scapy 逐包解析
+try:
+    import dpkt
+except Exception:
+    dpkt = None
+
+# numba 为可选依赖：可用时把每段的五个指标融合成一个 JIT 内核，否则逐个调用 NumPy 版本
+try:
+    from numba import njit, prange
+except Exception:
+    njit = None
+
+# 各时间段输出的指标名，顺序与 segment_metrics 返回的元组一致
+METRIC_NAMES = ('T', 'DE', 'MCR', 'NUMR', 'MCIV')
+
+# 可按原始字节直接解析的链路类型
+DLT_IEEE802_11 = 105          # 裸 802.11 帧
+DLT_IEEE802_11_RADIO = 127    # radiotap + 802.11
+
+# 经典 pcap 全局头魔数 -> (字节序, 时间戳小数部分的除数)
+_PCAP_MAGIC = {
+    b'\xd4\xc3\xb2\xa1': ('<', 1e6),   # 小端，微秒
+    b'\xa1\xb2\xc3\xd4': ('>', 1e6),   # 大端，微秒
+    b'\x4d\x3c\xb2\xa1': ('<', 1e9),   # 小端，纳秒
+    b'\xa1\xb2\x3c\x4d': ('>', 1e9),   # 大端，纳秒
+}
 
 
 def compute_update_cycle(timestamps):
     """
     计算平均相邻帧时间间隔，作为MAC地址更新周期的近似指标
+    排序后相邻间隔的均值即 (最大 - 最小) / (n - 1)，无需排序和求差分
     """
     if len(timestamps) < 2:
         return None
-    ts_sorted = sorted([float(ts) for ts in timestamps])
-    diffs = np.diff(ts_sorted)
-    return np.mean(diffs)
+    ts = np.asarray(timestamps, dtype=np.float64)
+    return np.ptp(ts) / (ts.size - 1)
 
 
 def compute_mac_de(mac_list):
@@ -21,11 +52,12 @@ def compute_mac_de(mac_list):
     """
     if len(mac_list) == 0:
         return None
-    counts = Counter(mac_list)
-    total = sum(counts.values())
-    probs = np.array(list(counts.values())) / total
-    entropy = -np.sum(probs * np.log(probs))
-    N = len(counts)
+    # 先映射成 0..N-1 的稠密编号，再一次 bincount 计数
+    inv = np.unique(np.asarray(mac_list), return_inverse=True)[1]
+    counts = np.bincount(inv.ravel())
+    probs = counts / counts.sum()
+    entropy = -np.dot(probs, np.log(probs))
+    N = counts.size
     if N > 1:
         normalized_entropy = entropy / np.log(N)
     else:
@@ -39,7 +71,8 @@ def compute_mac_change_rate(macs, total_time):
     """
     if len(macs) < 2 or total_time == 0:
         return 0
-    changes = sum(1 for i in range(1, len(macs)) if macs[i] != macs[i - 1])
+    macs = np.asarray(macs)
+    changes = int(np.count_nonzero(macs[1:] != macs[:-1]))
     return changes / total_time
 
 
@@ -58,16 +91,300 @@ def compute_mciv(timestamps, macs):
     计算MAC变化间隔方差 (MCIV)
     对于每次MAC切换，计算相邻切换间隔的时间差，返回这些时间差的方差
     """
-    intervals = []
-    for i in range(1, len(macs)):
-        if macs[i] != macs[i - 1]:
-            # 记录MAC变化的时间间隔
-            intervals.append(timestamps[i] - timestamps[i - 1])
-    if len(intervals) < 2:
+    macs = np.asarray(macs)
+    change = macs[1:] != macs[:-1]
+    if np.count_nonzero(change) < 2:
         return 0
+    # 记录MAC变化的时间间隔
+    intervals = np.diff(np.asarray(timestamps, dtype=np.float64))[change]
     return np.var(intervals)
 
 
+def compute_mcr_mciv(timestamps, macs, total_time):
+    """
+    一次遍历同时计算 MCR 与 MCIV：共用同一个“MAC 是否变化”掩码
+    结果与分别调用 compute_mac_change_rate / compute_mciv 一致
+    """
+    if len(macs) < 2:
+        return 0, 0
+    change = macs[1:] != macs[:-1]
+    changes = int(np.count_nonzero(change))
+    mcr = changes / total_time if total_time != 0 else 0
+    mciv = np.var((timestamps[1:] - timestamps[:-1])[change]) if changes >= 2 else 0
+    return mcr, mciv
+
+
+def _segment_metrics_kernel(ts, mac, segment_seconds):
+    """
+    单段融合内核（ts 已排序、mac 为 uint64）：一次遍历得到 T / DE / MCR / NUMR / MCIV
+    MCIV 用 Welford 在线方差；DE / NUMR 由排序后的 MAC 游程计数得到。T 不可算时返回 NaN
+    """
+    n = ts.shape[0]
+    T = (ts[n - 1] - ts[0]) / (n - 1) if n >= 2 else np.nan
+
+    changes = 0
+    mean = 0.0
+    m2 = 0.0
+    for i in range(1, n):
+        if mac[i] != mac[i - 1]:
+            changes += 1
+            d = ts[i] - ts[i - 1]
+            delta = d - mean
+            mean += delta / changes
+            m2 += delta * (d - mean)
+    mcr = changes / segment_seconds if n >= 2 and segment_seconds != 0 else 0.0
+    mciv = m2 / changes if changes >= 2 else 0.0
+
+    srt = np.sort(mac)
+    uniq = 0
+    h = 0.0
+    run = 1
+    for i in range(1, n + 1):
+        if i < n and srt[i] == srt[i - 1]:
+            run += 1
+        else:
+            p = run / n
+            h -= p * np.log(p)
+            uniq += 1
+            run = 1
+    de = h / np.log(uniq) if uniq > 1 else 1.0
+    numr = uniq / n
+    return T, de, mcr, numr, mciv
+
+
+# 显式签名：导入时即编译（命中磁盘缓存时只是加载），之后每次 process_pcap 都复用同一份机器码，
+# 不会因入参类型不同而重复编译。numba.pycc 的 AOT 已弃用，这里用 cache=True 达到同样效果
+# ts / mac 按只读数组声明（load_probe_data 返回只读的共享缓存），可写数组同样可以传入
+_RO_TS = "Array(f8, 1, 'A', readonly=True)"
+_RO_MAC = "Array(u8, 1, 'A', readonly=True)"
+_SEGMENT_SIG = f"UniTuple(f8, 5)({_RO_TS}, {_RO_MAC}, f8)"
+_ALL_SEGMENTS_SIG = f"f8[:, :]({_RO_TS}, {_RO_MAC}, i8[:], i8[:], f8)"
+# 放开重结合/近似等优化，但保留 NaN 语义（单包时间段的 T 以 NaN 表示）
+_FASTMATH = {"reassoc", "contract", "arcp", "nsz", "afn"}
+
+_segment_metrics_jit = (njit(_SEGMENT_SIG, cache=True, fastmath=_FASTMATH)(_segment_metrics_kernel)
+                        if njit is not None else None)
+
+
+def _all_segments_kernel(ts, mac, starts, ends, segment_seconds):
+    """
+    各时间段相互独立：prange 把段分摊到多核，每段调用融合内核
+    返回 (n_segs, 5) 数组，列依次为 T / DE / MCR / NUMR / MCIV
+    """
+    n_segs = starts.shape[0]
+    out = np.empty((n_segs, 5), dtype=np.float64)
+    for k in prange(n_segs):
+        lo = starts[k]
+        hi = ends[k]
+        T, de, mcr, numr, mciv = _segment_metrics_jit(ts[lo:hi], mac[lo:hi], segment_seconds)
+        out[k, 0] = T
+        out[k, 1] = de
+        out[k, 2] = mcr
+        out[k, 3] = numr
+        out[k, 4] = mciv
+    return out
+
+
+_all_segments_jit = (njit(_ALL_SEGMENTS_SIG, parallel=True, cache=True, fastmath=_FASTMATH)(_all_segments_kernel)
+                     if njit is not None else None)
+
+
+def segment_metrics(ts, mac, segment_seconds):
+    """
+    计算一个时间段的 (T, DE, MCR, NUMR, MCIV)；numba 可用时走融合内核
+    """
+    if _segment_metrics_jit is not None:
+        T, DE, MCR, NUMR, MCIV = _segment_metrics_jit(ts, mac, float(segment_seconds))
+        return (None if math.isnan(T) else T), DE, MCR, NUMR, MCIV
+    T = compute_update_cycle(ts)
+    DE = compute_mac_de(mac)
+    MCR, MCIV = compute_mcr_mciv(ts, mac, segment_seconds)
+    NUMR = compute_numr(mac)
+    return T, DE, MCR, NUMR, MCIV
+
+
+def _read_probe_requests_mmap(pcap_file):
+    """
+    零依赖快速路径：mmap 整个经典 pcap 文件，用 struct.unpack_from 顺序跳读记录头，
+    只在需要的偏移上读 radiotap 长度、帧控制字节和 addr2，不为每个包复制 bytes。
+    pcapng、未知魔数或链路类型不是 802.11 时返回 None，由调用方走其他路径。
+    """
+    with open(pcap_file, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        if size < 24:
+            return None
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            fmt = _PCAP_MAGIC.get(mm[:4])
+            if fmt is None:
+                return None
+            endian, divisor = fmt
+            linktype = struct.unpack_from(endian + 'I', mm, 20)[0] & 0x0FFFFFFF
+            if linktype not in (DLT_IEEE802_11, DLT_IEEE802_11_RADIO):
+                return None
+            radiotap = linktype == DLT_IEEE802_11_RADIO
+            rec_hdr = struct.Struct(endian + 'IIII')
+            unpack_hdr = rec_hdr.unpack_from
+            unpack_rtlen = struct.Struct('<H').unpack_from    # radiotap 长度字段固定小端
+            unpack_addr2 = struct.Struct('>HI').unpack_from   # 48 位 MAC 拆成高 16 位 + 低 32 位
+            ts_arr, mac_arr = array('d'), array('Q')
+            off = 24
+            while off + 16 <= size:
+                ts_sec, ts_frac, caplen, _ = unpack_hdr(mm, off)
+                frame = off + 16
+                off = frame + caplen
+                if off > size:   # 文件末尾被截断的记录
+                    break
+                hdr = unpack_rtlen(mm, frame + 2)[0] if radiotap and caplen >= 4 else 0
+                if caplen < hdr + 16 or mm[frame + hdr] & 0xFC != 0x40:
+                    continue
+                hi, lo = unpack_addr2(mm, frame + hdr + 10)
+                ts_arr.append(ts_sec + ts_frac / divisor)
+                mac_arr.append((hi << 32) | lo)
+    return ts_arr, mac_arr
+
+
+def _read_probe_requests_dpkt(f):
+    """
+    dpkt 快速路径：不构建 scapy 对象，只看 radiotap 长度与 802.11 帧头字节。
+    帧控制字段首字节 & 0xFC == 0x40 即 type=0（管理帧）、subtype=4（Probe Request）；addr2 在偏移 10..16。
+    链路类型不是 802.11 时返回 None，由调用方走兜底路径。
+    """
+    reader_cls = getattr(dpkt.pcap, "UniversalReader", dpkt.pcap.Reader)  # UniversalReader 同时支持 pcapng
+    try:
+        reader = reader_cls(f)
+    except ValueError:
+        return None
+    linktype = reader.datalink()
+    if linktype not in (DLT_IEEE802_11, DLT_IEEE802_11_RADIO):
+        return None
+    radiotap = linktype == DLT_IEEE802_11_RADIO
+    ts_arr, mac_arr = array('d'), array('Q')
+    for ts, buf in reader:
+        mac = _probe_addr2(buf, radiotap)
+        if mac is not None:
+            ts_arr.append(ts)
+            mac_arr.append(mac)
+    return ts_arr, mac_arr
+
+
+def _probe_addr2(buf, radiotap):
+    """
+    按原始字节判断一帧 802.11（可带 radiotap 头）是否为 Probe Request，
+    是则返回 addr2 打包成的 48 位整数，否则返回 None。
+    """
+    off = struct.unpack_from('<H', buf, 2)[0] if radiotap and len(buf) >= 4 else 0
+    if len(buf) < off + 16 or buf[off] & 0xFC != 0x40:
+        return None
+    return int.from_bytes(buf[off + 10:off + 16], 'big')
+
+
+def _read_probe_requests_scapy(pcap_file):
+    """
+    兜底路径：scapy RawPcapReader 流式读取（pcap / pcapng 均可），不为每个包构建 scapy 对象。
+    802.11 / radiotap 链路直接看帧控制字节；只有其他链路类型才交给 scapy 解析，且只取一次 Dot11 层。
+    """
+    ts_arr, mac_arr = array('d'), array('Q')
+    with RawPcapReader(pcap_file) as rd:
+        file_linktype = getattr(rd, 'linktype', None)            # pcapng 的链路类型在每个包的元数据里
+        divisor = 1e9 if getattr(rd, 'nano', False) else 1e6
+        for buf, meta in rd:
+            linktype = getattr(meta, 'linktype', file_linktype)
+            if linktype in (DLT_IEEE802_11, DLT_IEEE802_11_RADIO):
+                mac = _probe_addr2(buf, linktype == DLT_IEEE802_11_RADIO)
+            else:
+                cls = conf.l2types.num2layer.get(linktype)
+                if cls is None:
+                    continue
+                try:
+                    dot11 = cls(buf).getlayer(Dot11)
+                except Exception:
+                    continue
+                if dot11 is None or dot11.type != 0 or dot11.subtype != 4 or not dot11.addr2:
+                    continue
+                mac = int(dot11.addr2.replace(':', ''), 16)
+            if mac is None:
+                continue
+            if hasattr(meta, 'tshigh'):
+                ts = ((meta.tshigh << 32) + meta.tslow) / meta.tsresol if meta.tshigh is not None else 0.0
+            else:
+                ts = meta.sec + meta.usec / divisor
+            ts_arr.append(ts)
+            mac_arr.append(mac)
+    return ts_arr, mac_arr
+
+
+def read_probe_requests(pcap_file):
+    """
+    流式读取 pcap 中的 Probe Request，返回两条平行数组 (ts, mac)（按文件顺序）：
+    ts 为 float64 秒，mac 为 48 位源 MAC 打包成的 uint64
+    """
+    cols = _read_probe_requests_mmap(pcap_file)
+    if cols is None and dpkt is not None:
+        with open(pcap_file, 'rb') as f:
+            cols = _read_probe_requests_dpkt(f)
+    if cols is None:
+        cols = _read_probe_requests_scapy(pcap_file)
+    return np.frombuffer(cols[0], dtype=np.float64), np.frombuffer(cols[1], dtype=np.uint64)
+
+
+def load_probe_data(pcap_file):
+    """
+    读取 pcap 文件中的 Probe Request，按时间稳定排序并以最早时间为0点对齐。
+    结果按 (路径, mtime, size) 缓存：同一文件换不同分段时长时不再重复解析，文件被重写后重新读取。
+    :param pcap_file: pcap 文件路径
+    :return: (时间戳 float64 数组, MAC uint64 数组)，两者一一对应；为共享缓存，均为只读
+    """
+    st = os.stat(pcap_file)
+    return _load_probe_data(os.path.abspath(pcap_file), st.st_mtime_ns, st.st_size)
+
+
+@lru_cache(maxsize=8)
+def _load_probe_data(path, mtime_ns, size):
+    ts, mac = read_probe_requests(path)
+    if ts.size:
+        order = np.argsort(ts, kind='stable')
+        ts = ts[order]
+        mac = mac[order]
+        ts -= ts[0]
+    ts.flags.writeable = False
+    mac.flags.writeable = False
+    return ts, mac
+
+
+def segment_and_metrics(ts, mac, segment_seconds):
+    """
+    对已排序、已对齐的 (ts, mac) 按指定时间段划分，计算各段指标。
+    :param ts: 时间戳数组（升序，首个为0）
+    :param mac: 与 ts 对应的 MAC 数组
+    :param segment_seconds: 分段时长，单位秒
+    :return: 字典 {指标名: 各非空时间段该指标组成的 float64 数组}，无法计算的段（NaN）已剔除
+    """
+    if ts.size == 0:
+        return {m: np.empty(0) for m in METRIC_NAMES}
+
+    # 时间已排序，同一时间段在数组中是连续的一段：对段边界二分查找即可切分，
+    # 不再为每个包生成段号数组，也不需要 np.unique 的整体排序
+    n_total = int(ts[-1] // segment_seconds) + 1
+    cuts = np.searchsorted(ts, np.arange(1, n_total) * segment_seconds, side='left')
+    starts = np.concatenate(([0], cuts))
+    ends = np.concatenate((cuts, [ts.size]))
+    seg_keys = np.flatnonzero(ends > starts)   # 跳过没有包的空段
+    starts, ends = starts[seg_keys], ends[seg_keys]
+
+    if _all_segments_jit is not None:
+        table = _all_segments_jit(ts, mac, starts, ends, float(segment_seconds))
+    else:
+        rows = [segment_metrics(ts[a:b], mac[a:b], segment_seconds)
+                for a, b in zip(starts.tolist(), ends.tolist())]
+        table = np.array([[np.nan if v is None else v for v in r] for r in rows], dtype=np.float64)
+
+    results = {}
+    for i, m in enumerate(METRIC_NAMES):
+        col = table[:, i]
+        results[m] = col[~np.isnan(col)]
+    return results
+
+
 def process_pcap(pcap_file, segment_seconds):
     """
     读取 pcap 文件，按指定时间段划分，返回各时间段内的平均更新周期 (T)、MAC地址熵 (DE)、
@@ -75,39 +392,10 @@ def process_pcap(pcap_file, segment_seconds):
     对时间戳进行对齐处理，即以最早时间为0点。
     :param pcap_file: pcap 文件路径
     :param segment_seconds: 分段时长，单位秒
-    :return: 字典 {segment_index: {'T': update_cycle, 'DE': mac_de, 'MCR': mac_change_rate, 'NUMR': numr, 'MCIV': mciv}}
-    """
-    packets = rdpcap(pcap_file)
-    data = []
-    for pkt in packets:
-        if pkt.haslayer(Dot11):
-            if pkt.type == 0 and pkt.subtype == 4:  # Probe Request帧
-                ts = pkt.time
-                src_mac = pkt.addr2
-                data.append((ts, src_mac))
-    if not data:
-        return {}
-    data.sort(key=lambda x: x[0])
-    start_time = data[0][0]
-    data_aligned = [(float(ts) - float(start_time), mac) for ts, mac in data]
-
-    segments = {}
-    for ts, mac in data_aligned:
-        seg_idx = int(ts // segment_seconds)
-        if seg_idx not in segments:
-            segments[seg_idx] = {'timestamps': [], 'macs': []}
-        segments[seg_idx]['timestamps'].append(ts)
-        segments[seg_idx]['macs'].append(mac)
-
-    results = {}
-    for seg, vals in segments.items():
-        T = compute_update_cycle(vals['timestamps'])
-        DE = compute_mac_de(vals['macs'])
-        MCR = compute_mac_change_rate(vals['macs'], segment_seconds)
-        NUMR = compute_numr(vals['macs'])
-        MCIV = compute_mciv(vals['timestamps'], vals['macs'])
-        results[seg] = {'T': T, 'DE': DE, 'MCR': MCR, 'NUMR': NUMR, 'MCIV': MCIV}
-    return results
+    :return: 字典 {指标名: 各时间段该指标组成的 float64 数组}，见 segment_and_metrics
+    """
+    ts, mac = load_probe_data(pcap_file)
+    return segment_and_metrics(ts, mac, segment_seconds)
 
 
 def compute_mac_rca(T_sim, T_real):
@@ -129,62 +417,32 @@ if __name__ == "__main__":
     real_pcap = r"D:\lunwen\数据集代码_王敏\代码\probe_request_simulation2\data_devB_dataset_merged.pcap"
     sim_pcap = r"D:\lunwen\数据集代码_王敏\代码\probe_request_simulation2\out_file_run_1.pcap"
 
+    # (指标名, 输出标签, 单位后缀, 数据不足时的提示名)
+    report = [
+        ('T', "Update Cycle (T)", " s", "update cycle"),
+        ('DE', "MAC Entropy (MAE)", "", "MAC entropy"),
+        ('MCR', "MAC Change Rate (MCR)", " changes/s", "MAC change rate"),
+        ('NUMR', "Unique MAC Ratio (NUMR)", "", "NUMR"),
+        ('MCIV', "MAC Change Interval Variance (MCIV)", "", "MCIV"),
+    ]
+
+    # 两个 pcap 只解析一次，四种分段时长复用同一份 (ts, mac)
+    real_data = load_probe_data(real_pcap)
+    sim_data = load_probe_data(sim_pcap)
+
     for seg_time in segments:
         print(f"\n=== Time Segment: {seg_time / 60:.0f} minutes ===")
-        real_results = process_pcap(real_pcap, seg_time)
-        sim_results = process_pcap(sim_pcap, seg_time)
+        real_results = segment_and_metrics(*real_data, seg_time)
+        sim_results = segment_and_metrics(*sim_data, seg_time)
 
         # 针对每个段，取所有时间窗口的均值作为全局指标
-        real_T_values = [v['T'] for v in real_results.values() if v['T'] is not None]
-        real_DE_values = [v['DE'] for v in real_results.values() if v['DE'] is not None]
-        real_MCR_values = [v['MCR'] for v in real_results.values()]
-        real_NUMR_values = [v['NUMR'] for v in real_results.values()]
-        real_MCIV_values = [v['MCIV'] for v in real_results.values()]
-
-        sim_T_values = [v['T'] for v in sim_results.values() if v['T'] is not None]
-        sim_DE_values = [v['DE'] for v in sim_results.values() if v['DE'] is not None]
-        sim_MCR_values = [v['MCR'] for v in sim_results.values()]
-        sim_NUMR_values = [v['NUMR'] for v in sim_results.values()]
-        sim_MCIV_values = [v['MCIV'] for v in sim_results.values()]
-
-        if real_T_values and sim_T_values:
-            real_T_mean = np.mean(real_T_values)
-            sim_T_mean = np.mean(sim_T_values)
-            mac_rca = compute_mac_rca(sim_T_mean, real_T_mean)
-            print(f"Real Update Cycle (T): {real_T_mean:.2f} s")
-            print(f"Simulated Update Cycle (T): {sim_T_mean:.2f} s")
-            print(f"MAC-RCA (MRCA): {mac_rca:.2f}")
-        else:
-            print("Insufficient data for update cycle computation.")
-
-        if real_DE_values and sim_DE_values:
-            real_DE_mean = np.mean(real_DE_values)
-            sim_DE_mean = np.mean(sim_DE_values)
-            print(f"Real MAC Entropy (MAE): {real_DE_mean:.2f}")
-            print(f"Simulated MAC Entropy (MAE): {sim_DE_mean:.2f}")
-        else:
-            print("Insufficient data for MAC entropy computation.")
-
-        if real_MCR_values and sim_MCR_values:
-            real_MCR_mean = np.mean(real_MCR_values)
-            sim_MCR_mean = np.mean(sim_MCR_values)
-            print(f"Real MAC Change Rate (MCR): {real_MCR_mean:.2f} changes/s")
-            print(f"Simulated MAC Change Rate (MCR): {sim_MCR_mean:.2f} changes/s")
-        else:
-            print("Insufficient data for MAC change rate computation.")
-
-        if real_NUMR_values and sim_NUMR_values:
-            real_NUMR_mean = np.mean(real_NUMR_values)
-            sim_NUMR_mean = np.mean(sim_NUMR_values)
-            print(f"Real Unique MAC Ratio (NUMR): {real_NUMR_mean:.2f}")
-            print(f"Simulated Unique MAC Ratio (NUMR): {sim_NUMR_mean:.2f}")
-        else:
-            print("Insufficient data for NUMR computation.")
-
-        if real_MCIV_values and sim_MCIV_values:
-            real_MCIV_mean = np.mean(real_MCIV_values)
-            sim_MCIV_mean = np.mean(sim_MCIV_values)
-            print(f"Real MAC Change Interval Variance (MCIV): {real_MCIV_mean:.2f}")
-            print(f"Simulated MAC Change Interval Variance (MCIV): {sim_MCIV_mean:.2f}")
-        else:
-            print("Insufficient data for MCIV computation.")
+        for m, label, unit, missing in report:
+            if real_results[m].size and sim_results[m].size:
+                real_mean = np.mean(real_results[m])
+                sim_mean = np.mean(sim_results[m])
+                print(f"Real {label}: {real_mean:.2f}{unit}")
+                print(f"Simulated {label}: {sim_mean:.2f}{unit}")
+                if m == 'T':
+                    print(f"MAC-RCA (MRCA): {compute_mac_rca(sim_mean, real_mean):.2f}")
+            else:
+                print(f"Insufficient data for {missing} computation.")
@@ -1,19 +1,32 @@
 #!/usr/bin/env python3
+import mmap
+import os
 import random
+import re
 
 # —— 预处理 OUI 数据 ——
 # 从 'oui.txt' 中提取 OUI 信息，生成 'oui_hex.txt'
-with open('oui.txt', encoding='utf-8', errors='replace') as f:
-    lines = f.readlines()
-    count = 0
-    # 初始化输出文件（覆盖旧数据）
+# 只在 oui_hex.txt 不存在或比 oui.txt 旧时重新生成；oui.txt 经 mmap 由正则直接找出 "(hex)" 行
+_OUI_HEX_LINE = re.compile(rb"^.*\(hex\).*$", re.M)
+
+
+def _oui_hex_needs_refresh():
+    if not os.path.exists('oui_hex.txt'):
+        return True
+    return os.path.exists('oui.txt') and os.path.getmtime('oui_hex.txt') < os.path.getmtime('oui.txt')
+
+
+if _oui_hex_needs_refresh():
+    with open('oui.txt', 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        hex_lines = [m.group(0).decode('utf-8', errors='replace').strip().split("\t")
+                     for m in _OUI_HEX_LINE.finditer(mm)]
+    count = len(hex_lines)
+    # 初始化输出文件（覆盖旧数据），一次写出
     with open('oui_hex.txt', 'w', encoding='utf-8') as f_out:
-        for line in lines:
-            l = line.strip().split("\t")
-            if "(hex)" in line:
-                count += 1
-                f_out.write(l[0][0:8] + "\t" + l[2] + "\n")
-print("Processed OUI count:", count)
+        f_out.writelines(l[0][0:8] + "\t" + l[2] + "\n" for l in hex_lines)
+    print("Processed OUI count:", count)
+else:
+    print("oui_hex.txt is up to date, skipping OUI preprocessing")
 
 # —— 以下是用户配置阶段生成设备配置文件 1.txt 和 2.txt 的代码 ——
 # 修改后的模板：
@@ -28,12 +41,6 @@ TEMPLATE_2 = ("# device_name, Phase (0 Locked 1 Awake 2 Active), "
               "state dwell time (value:probability/... ), "
               "jitter (value:probability/... )\n")
 
-# 初始化文件（覆盖旧数据）
-with open('1.txt', 'w') as f:
-    f.write(TEMPLATE_1)
-with open('2.txt', 'w') as f:
-    f.write(TEMPLATE_2)
-
 # 厂商与设备型号映射
 vendor_device_map = {
     'OnePlus': ['nord 5g', 'one plus9pro', 'one plus9rt', 'one plus8t', 'one plus8pro', 'one plus8', 'one plus7t',
@@ -59,6 +66,7 @@ vendor_device_map = {
     'MeiZu': ['18', '18s', '18plus', '18v', '18lite'],
     'Nubia': ['red magic7', 'red magic7pro', 'red magic7s', 'red magic7mini'],
 }
+_VENDOR_NAMES = tuple(vendor_device_map.keys())
 
 def get_device_name(vendor):
     return random.choice(vendor_device_map.get(vendor, ["default_device"]))
@@ -69,15 +77,15 @@ def generate_vht_capabilities():
     if random.random() < 0.7:
         return "?"
     else:
-        return ''.join(random.choices('0123456789abcdef', k=16))
+        return os.urandom(8).hex()
 
 # 扩展能力：生成 6 字节（12 个十六进制字符）
 def generate_extended_capabilities():
-    return ''.join(random.choices('0123456789abcdef', k=12))
+    return os.urandom(6).hex()
 
 # HT 能力：生成 8 字节（16 个十六进制字符）
 def generate_ht_capabilities():
-    return ''.join(random.choices('0123456789abcdef', k=16))
+    return os.urandom(8).hex()
 
 # 生成 MAC 策略：0 - 永久 MAC, 1 - 完全随机, 2 - 随机但保留 OUI, 3 - 专用/预生成 MAC
 def generate_mac_policy():
@@ -125,8 +133,11 @@ def generate_jitter():
 # － burst 内部间隔设为 20～100 毫秒之间
 # － burst 之间间隔设为 2～5 秒之间
 # － burst 长度限定为 1～3 帧
+# 两个文件的内容先攒在列表里，最后各自一次写出（覆盖旧数据）
+lines1 = [TEMPLATE_1]
+lines2 = [TEMPLATE_2]
 for i in range(100):
-    vendor_name = random.choice(list(vendor_device_map.keys()))
+    vendor_name = random.choice(_VENDOR_NAMES)
     device_name = get_device_name(vendor_name)
 
     for phase in range(3):
@@ -140,8 +151,7 @@ for i in range(100):
         )
         state_dwell = generate_state_dwell()
         jitter = generate_jitter()
-        with open('2.txt', 'a') as f2:
-            f2.write(f"{device_name},{phase},{burst_time_in},{burst_time_between},{state_dwell},{jitter}\n")
+        lines2.append(f"{device_name},{phase},{burst_time_in},{burst_time_between},{state_dwell},{jitter}\n")
 
     burst_length = '/'.join(
         f"{b}:{round(random.uniform(0.1, 0.9)*100)/100}" for b in range(1, random.randint(2, 4))
@@ -153,6 +163,10 @@ for i in range(100):
     supported_rates = generate_supported_rates()
     ext_supported_rates = generate_ext_supported_rates()
 
-    with open('1.txt', 'a') as f1:
-        f1.write(f"{vendor_name},{device_name},{burst_length},{mac_policy},{vht_cap},{ext_cap},{ht_cap},"
-                 f"{supported_rates},{ext_supported_rates}\n")
\ No newline at end of file
+    lines1.append(f"{vendor_name},{device_name},{burst_length},{mac_policy},{vht_cap},{ext_cap},{ht_cap},"
+                  f"{supported_rates},{ext_supported_rates}\n")
+
+with open('1.txt', 'w') as f1:
+    f1.writelines(lines1)
+with open('2.txt', 'w') as f2:
+    f2.writelines(lines2)
\ No newline at end of file
@@ -2,49 +2,93 @@
 # user_space.py （合并后的完整版本）
 # =========================
 # user_space.py
-from datetime import timedelta
 import numpy as np
-from numpy import random
 import os
 import math
-import time
+import bisect
+import pickle
+from functools import lru_cache, partial
+
+# numba 为可选依赖：可用时把多步运动推进编译成机器码，否则逐步用 NumPy 向量运算
+try:
+    from numba import njit
+except Exception:
+    njit = None
 
 PERMANENT_MAC = "00:11:22:33:44:55"
 DEDICATED_MAC = "02:12:34:56:78:9a"
 MAC_MASK = "ff:ff:ff:00:00:00"
+# 策略 0 / 3 的 MAC 是常量，小写形式只算一次
+_PERM_MAC_L = PERMANENT_MAC.lower()
+_DED_MAC_L = DEDICATED_MAC.lower()
 
+# 设备侧随机源：进程内唯一的 numpy Generator（PCG64），可用 seed_rng 重新播种
+_RNG = np.random.default_rng()
 
-def get_oui(vendor_name: str) -> [str, str]:
+
+def seed_rng(seed=None):
+    """重新播种设备侧随机源（int、SeedSequence 或 None），并丢弃已预抽的设备属性。"""
+    global _RNG, _device_attr_rows
+    _RNG = np.random.default_rng(seed)
+    _device_attr_rows = []
+
+# 随机串的字母表（uint8），按下标整体取字符后一次 decode
+_HEX_ALPHABET = np.frombuffer(b"0123456789abcdef", dtype=np.uint8)
+_SSID_ALPHABET = np.frombuffer(b"abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789", dtype=np.uint8)
+# SSID 列表存成定长字节串数组（每个 32 字节）；不带 SSID 的设备共用这个空数组
+_NO_SSID = np.empty(0, dtype="S32")
+
+
+# oui_hex.txt 只解析一次：厂商名 -> OUI 列表（文件顺序），以及按小写厂商名排序的前缀索引
+_OUI_BY_VENDOR = None
+_OUI_PREFIX_INDEX = None   # [(小写厂商名, 首次出现序号, 厂商名)]，已排序
+_OUI_LOOKUP_CACHE = {}     # 查询名（小写）-> [oui, 厂商名]
+
+
+def _load_oui_table():
+    global _OUI_BY_VENDOR, _OUI_PREFIX_INDEX
     oui = {}
     with open('oui_hex.txt', encoding='utf-8') as f:
-        for line in f.readlines():
+        for line in f.read().split("\n"):
             parts = line.strip().split("\t")
             if len(parts) < 2:
                 continue
-            mac = parts[0]
-            vendor = parts[1]
-            if vendor in oui:
-                oui[vendor].append(mac)
-            else:
-                oui[vendor] = [mac]
-    res = ""
-    res_name = ""
-    for key in oui:
-        if key.lower().startswith(vendor_name.lower()):
-            res = oui[key][0]
-            res_name = key
-            break
-    if not res:
-        res = "00:00:00"
-        res_name = "default"
-    return [res.replace("-", ":"), res_name]
+            oui.setdefault(parts[1], []).append(parts[0])
+    _OUI_BY_VENDOR = oui
+    _OUI_PREFIX_INDEX = sorted((key.lower(), order, key) for order, key in enumerate(oui))
 
 
-def get_frequency(channel: int) -> int:
-    if channel == 14:
-        return 2484
+def get_oui(vendor_name: str) -> [str, str]:
+    # 结果与逐行扫描一致：取文件中第一个（小写后）以 vendor_name 开头的厂商
+    query = vendor_name.lower()
+    cached = _OUI_LOOKUP_CACHE.get(query)
+    if cached is not None:
+        return list(cached)
+    if _OUI_BY_VENDOR is None:
+        _load_oui_table()
+    best = None
+    i = bisect.bisect_left(_OUI_PREFIX_INDEX, (query,))
+    while i < len(_OUI_PREFIX_INDEX) and _OUI_PREFIX_INDEX[i][0].startswith(query):
+        if best is None or _OUI_PREFIX_INDEX[i][1] < best[1]:
+            best = _OUI_PREFIX_INDEX[i]
+        i += 1
+    if best is None:
+        res, res_name = "00:00:00", "default"
     else:
-        return 2407 + (channel * 5)
+        res, res_name = _OUI_BY_VENDOR[best[2]][0], best[2]
+    result = [res.replace("-", ":"), res_name]
+    _OUI_LOOKUP_CACHE[query] = result
+    return list(result)
+
+
+# 2.4 GHz 信道 0~14 的中心频率（MHz）预先算好，逐包只做一次下标查找
+_CHANNEL_FREQ = tuple(2484 if ch == 14 else 2407 + ch * 5 for ch in range(15))
+
+
+def get_frequency(channel: int) -> int:
+    if 0 <= channel < len(_CHANNEL_FREQ):
+        return _CHANNEL_FREQ[channel]
+    return 2407 + (channel * 5)
 
 
 def produce_sequenceNumber(frag: int, seq: int) -> int:
@@ -52,57 +96,190 @@ def produce_sequenceNumber(frag: int, seq: int) -> int:
 
 
 def random_MAC() -> str:
-    first_byte = int('%d%d%d%d%d%d10' % (random.randint(0, 1), random.randint(0, 1), random.randint(0, 1),
-                                          random.randint(0, 1), random.randint(0, 1), random.randint(0, 1)), 2)
-    mac_address = ("%02x:%02x:%02x:%02x:%02x:%02x" % (
-        first_byte,
-        random.randint(0, 255),
-        random.randint(0, 255),
-        random.randint(0, 255),
-        random.randint(0, 255),
-        random.randint(0, 255)
-    )).lower()
-    return mac_address
+    # 一次取 6 个随机字节；首字节低两位置为 10（本地管理、单播）
+    mac = bytearray(_RNG.bytes(6))
+    mac[0] = (mac[0] & 0xFC) | 0x02
+    return mac.hex(":")
 
 
 def random_hex(number_of_elements: int):
-    hex_chars = list("abcdef0123456789")
-    return "".join(random.choices(hex_chars, k=number_of_elements))
+    idx = _RNG.integers(0, len(_HEX_ALPHABET), size=number_of_elements)
+    return _HEX_ALPHABET[idx].tobytes().decode("ascii")
 
 
+@lru_cache(maxsize=4096)
 def mac_str_to_bytes(mac_str: str) -> bytes:
+    # 每段两位十六进制的常见写法走 C 实现的 bytes.fromhex；段长不一（如 "0:1:2"）时再逐段解析
+    try:
+        mac_bytes = bytes.fromhex(mac_str.replace(":", ""))
+        if len(mac_bytes) == mac_str.count(":") + 1:
+            return mac_bytes
+    except ValueError:
+        pass
     return bytes(int(b, 16) for b in mac_str.split(":"))
 
 
 def bytes_to_mac_str(mac_bytes: bytes) -> str:
-    return ":".join('{:02x}'.format(b) for b in mac_bytes)
+    return bytes(mac_bytes).hex(":")
+
+
+@lru_cache(maxsize=None)
+def _mac_mask_ints(base: str, mask: str):
+    """把 base / mask 解析为 48 位整数（不足 6 字节右侧补 0），返回 (base & mask, ~mask)。"""
+    base_int = int.from_bytes(mac_str_to_bytes(base)[:6].ljust(6, b"\0"), "big")
+    mask_int = int.from_bytes(mac_str_to_bytes(mask)[:6].ljust(6, b"\0"), "big")
+    return base_int & mask_int, ~mask_int & 0xFFFFFFFFFFFF
+
+
+def _masked_random_mac(fixed: int, free: int) -> str:
+    """fixed / free 为 _mac_mask_ints 的结果：free 对应的位取随机，其余取 fixed。"""
+    rand = int.from_bytes(_RNG.bytes(6), "big")
+    return (fixed | (rand & free)).to_bytes(6, "big").hex(":")
 
 
 def random_mac_addr_with_mask(base: str, mask: str) -> str:
-    base_bytes = bytearray(mac_str_to_bytes(base))
-    if len(base_bytes) < 6:
-        base_bytes.extend([0] * (6 - len(base_bytes)))
-    mask_bytes = bytearray(mac_str_to_bytes(mask))
-    if len(mask_bytes) < 6:
-        mask_bytes.extend([0] * (6 - len(mask_bytes)))
-    result = bytearray(6)
-    for i in range(6):
-        rand_byte = os.urandom(1)[0]
-        # 由 mask=1 的位取 base，对应位为 0 的用随机
-        result[i] = (base_bytes[i] & mask_bytes[i]) | (rand_byte & (~mask_bytes[i] & 0xFF))
-    return bytes_to_mac_str(result)
+    # 由 mask=1 的位取 base，对应位为 0 的用随机；6 个字节作为一个 48 位整数一次完成
+    return _masked_random_mac(*_mac_mask_ints(base, mask))
+
+
+def _advance_kernel(positions, speeds, directions, turns, delta_t):
+    """
+    连续推进 turns.shape[0] 步：每步直线运动 delta_t 秒、截断到 [0,100]，再叠加方向扰动 turns[步, 设备]。
+    positions / directions 原地更新。
+    """
+    steps, n = turns.shape
+    for s in range(steps):
+        for i in range(n):
+            rad = math.radians(directions[i])
+            step = speeds[i] * delta_t
+            positions[i, 0] = min(100.0, max(0.0, positions[i, 0] + step * math.cos(rad)))
+            positions[i, 1] = min(100.0, max(0.0, positions[i, 1] + step * math.sin(rad)))
+            directions[i] = (directions[i] + turns[s, i]) % 360.0
+
+
+_ADVANCE_SIG = "void(f8[:, :], f8[:], f8[:], f8[:, :], f8)"
+_advance_jit = njit(_ADVANCE_SIG, cache=True)(_advance_kernel) if njit is not None else None
+
+
+class MotionTable:
+    """
+    设备运动状态的 SoA 存储：位置 (N,2)、速度 (N,)、方向 (N,) 各占一块连续数组。容量不足时按倍数扩容。
+    update 只累计待推进的步数，读取位置（或增删设备）前由 sync 一次性推进全部设备，
+    多个事件之间的运动因此在一次（numba 编译的）调用里完成。
+    rng 为方向扰动的随机源（numpy Generator），缺省用模块级的 _RNG。
+    """
+    def __init__(self, capacity=16, rng=None):
+        self.rng = rng if rng is not None else _RNG
+        self.n = 0
+        self.pending = 0          # 尚未执行的步数
+        self.pending_dt = None    # 这些步的步长（秒）
+        self.positions = np.zeros((capacity, 2))
+        self.speeds = np.zeros(capacity)
+        self.directions = np.zeros(capacity)
+
+    def add(self, position, speed, direction) -> int:
+        # 新设备不参与加入前累计的步数
+        self.sync()
+        if self.n == self.speeds.shape[0]:
+            cap = 2 * self.n
+            self.positions = np.resize(self.positions, (cap, 2))
+            self.speeds = np.resize(self.speeds, cap)
+            self.directions = np.resize(self.directions, cap)
+        row = self.n
+        self.positions[row] = position
+        self.speeds[row] = speed
+        self.directions[row] = direction
+        self.n += 1
+        return row
+
+    def update(self, delta_t):
+        # 与 Device.update_position 相同的一步运动，先记账，等 sync 时批量执行
+        if self.n == 0:
+            return
+        if self.pending and delta_t != self.pending_dt:
+            self.sync()
+        self.pending += 1
+        self.pending_dt = delta_t
+
+    def step_rows(self, rows, delta_t):
+        """只推进指定行（设备）一步，模型与 update 相同；供单个设备自行调用 update_position 时使用。"""
+        self.sync()
+        rows = np.asarray(rows, dtype=np.intp)
+        rad = np.deg2rad(self.directions[rows])
+        step = self.speeds[rows] * delta_t
+        self.positions[rows, 0] = np.clip(self.positions[rows, 0] + step * np.cos(rad), 0, 100)
+        self.positions[rows, 1] = np.clip(self.positions[rows, 1] + step * np.sin(rad), 0, 100)
+        self.directions[rows] = (self.directions[rows] + self.rng.uniform(-10, 10, rows.shape[0])) % 360
+
+    def sync(self):
+        """执行累计的步数：直线运动 + 边界截断 + 方向随机扰动，全部设备一起推进。"""
+        steps, n = self.pending, self.n
+        if steps == 0 or n == 0:
+            self.pending = 0
+            return
+        self.pending = 0
+        turns = self.rng.uniform(-10, 10, (steps, n))
+        pos, speeds, dirs = self.positions[:n], self.speeds[:n], self.directions[:n]
+        if _advance_jit is not None:
+            _advance_jit(pos, speeds, dirs, turns, float(self.pending_dt))
+            return
+        step = speeds * self.pending_dt
+        for turn in turns:
+            rad = np.radians(dirs)
+            pos[:, 0] += step * np.cos(rad)
+            pos[:, 1] += step * np.sin(rad)
+            np.clip(pos, 0, 100, out=pos)
+            dirs[:] = (dirs + turn) % 360
+
+
+def _draw_device_attributes(n):
+    """
+    一次为 n 台设备抽取全部随机属性，返回每台设备一个元组：
+    (queue_length, processing_delay, power_level, x, y, speed, direction, has_wps, has_ssid)
+    """
+    return list(zip(
+        _RNG.integers(1, 10, n).tolist(),
+        _RNG.uniform(0.001, 0.005, n).tolist(),
+        _RNG.uniform(10, 20, n).tolist(),           # dBm
+        _RNG.uniform(0, 100, n).tolist(),           # 初始位置 x
+        _RNG.uniform(0, 100, n).tolist(),           # 初始位置 y
+        _RNG.uniform(0.5, 2.0, n).tolist(),         # 米/秒
+        _RNG.uniform(0, 360, n).tolist(),
+        (_RNG.random(n) < 0.11).tolist(),           # 带 WPS / UUID-E
+        (_RNG.random(n) < 0.2).tolist(),            # 带 SSID 列表
+    ))
+
+
+# 设备属性按块预抽：设备是逐个事件创建的，每块一次向量化抽 _DEVICE_ATTR_BLOCK 台，逐台取用
+_DEVICE_ATTR_BLOCK = 256
+_device_attr_rows = []
+
+
+def _next_device_attributes():
+    """取下一台设备的属性（_draw_device_attributes 的一行），块用完时整块补抽。"""
+    global _device_attr_rows
+    if not _device_attr_rows:
+        _device_attr_rows = _draw_device_attributes(_DEVICE_ATTR_BLOCK)[::-1]
+    return _device_attr_rows.pop()
 
 
 class Device:
     def __init__(self, id, time, phase, vendor, model, randomization):
+        # 加入 MotionTable 前运动状态存在本对象上，加入后读写表中对应的行
+        self._motion = None
+        self._row = None
         self.id = id
         self.time_phase_changed = time
         self.phase = phase  # 0: 锁屏, 1: 亮屏, 2: 活动
         self.vendor = vendor
         self.model = model.replace(" ", "").lower()
         self.randomization = randomization
-        self.SSID = []
-        self.mac_address = []
+        # 按策略一次性绑定 MAC 生成函数，create_mac_address 不再逐次判断分支
+        self._mac_factory = self._bind_mac_factory(vendor, randomization)
+        self.SSID = _NO_SSID
+        # 当前使用的 MAC，以及用过的不同 MAC（dict 当作保序集合，只供结束时的标注与统计）
+        self._current_mac = None
+        self._macs = {}
         self.number_packets_sent = 0
         self.number_bursts_sent = 0
         self.wps = None
@@ -110,68 +287,78 @@ class Device:
 
         # ★新增：MAC 轮换策略（'per_burst' | 'per_phase' | 'interval'）
         self.mac_rotation_mode = 'per_burst'
-        self._next_mac_change_ts = None
+        # interval 模式下一次换 MAC 的仿真时刻（Unix 秒，float）；-inf 表示首个 burst 即更换
+        self._next_mac_change_ts = -math.inf
 
-        # 硬件及调度参数
-        self.queue_length = np.random.randint(1, 10)
-        self.processing_delay = random.uniform(0.001, 0.005)
-        self.power_level = random.uniform(10, 20)  # dBm
-        self.position = (random.uniform(0, 100), random.uniform(0, 100))  # 初始位置
-        self.speed = random.uniform(0.5, 2.0)  # 米/秒
-        self.direction = random.uniform(0, 360)
+        # 硬件及调度参数：取预抽属性块中的下一行
+        (self.queue_length, self.processing_delay, self.power_level, x, y,
+         self.speed, self.direction, has_wps, has_ssid) = _next_device_attributes()
+        self.position = (x, y)  # 初始位置
 
         self.force_mac_change = True
 
+        # 事件惰性失效用：相位纪元在每次相位切换时递增；删除后 _alive 置 False
+        self._phase_epoch = 0
+        self._alive = True
+
         if self.randomization in [0, 3] and not self.force_mac_change:
-            self.mac_address.append(self.create_mac_address())
-        if np.random.choice([True, False], p=[0.11, 0.89]):
-            self.wps = bytes.fromhex(''.join(np.random.choice(list("0123456789abcdef"), 8)))
-            self.uuide = bytes.fromhex(''.join(np.random.choice(list("0123456789abcdef"), 8)))
-        if np.random.choice([True, False], p=[0.2, 0.8]):
+            self._use_mac(self.create_mac_address())
+        if has_wps:
+            self.wps = _RNG.bytes(4)
+            self.uuide = _RNG.bytes(4)
+        if has_ssid:
             self.SSID = self.create_ssid()
 
+    @staticmethod
+    def _bind_mac_factory(vendor, randomization):
+        """
+        0: 永久 MAC；1: 随机本地 MAC（置 U/L 位）；2: 厂商 OUI + 随机后缀（OUI 与掩码在此解析成整数）；
+        3: 专用 MAC；其他取值按 0 处理。
+        """
+        if randomization == 1:
+            return random_MAC
+        if randomization == 2:
+            return partial(_masked_random_mac, *_mac_mask_ints(get_oui(vendor)[0].lower(), MAC_MASK))
+        if randomization == 3:
+            return lambda: _DED_MAC_L
+        return lambda: _PERM_MAC_L
+
     def create_mac_address(self):
-        if self.randomization == 0:
-            return PERMANENT_MAC.lower()
-        elif self.randomization == 1:
-            # 随机本地 MAC：置 U/L 位
-            mac = bytearray(os.urandom(6))
-            mac[0] &= 0xFE
-            mac[0] |= 0x02
-            return ":".join(f"{b:02x}" for b in mac)
-        elif self.randomization == 2:
-            vendor_oui = get_oui(self.vendor)[0].lower()
-            return random_mac_addr_with_mask(vendor_oui, MAC_MASK)
-        elif self.randomization == 3:
-            return DEDICATED_MAC.lower()
-        else:
-            return PERMANENT_MAC.lower()
+        return self._mac_factory()
+
+    def _use_mac(self, mac):
+        self._current_mac = mac
+        self._macs[mac] = None
+
+    @property
+    def mac_address(self):
+        """用过的不同 MAC，按首次使用的顺序。"""
+        return list(self._macs)
+
+    @property
+    def mac_count(self):
+        return len(self._macs)
 
     def send_probe(self, inter_pkt_time, VHT_capabilities, extended_capabilities, HT_capabilities,
                    num_pkt_burst, timestamp, channel, supported_rates, ext_supported_rates):
-        time.sleep(self.processing_delay)
         from kernel_driver import create_probe
 
         # ★新增：按策略决定是否更换 MAC
         need_change = self.force_mac_change
-        if getattr(self, 'mac_rotation_mode', 'per_burst') == 'interval':
-            now = timestamp
-            if self._next_mac_change_ts is None or now >= self._next_mac_change_ts:
-                need_change = True
-                # 间隔 20–60 秒一次
-                self._next_mac_change_ts = now + timedelta(seconds=float(random.uniform(20, 60)))
+        # timestamp 为仿真时间（Unix 秒），与 _next_mac_change_ts 直接做浮点比较
+        if self.mac_rotation_mode == 'interval' and timestamp >= self._next_mac_change_ts:
+            need_change = True
+            # 间隔 20–60 秒一次
+            self._next_mac_change_ts = timestamp + _RNG.uniform(20, 60)
 
-        new_mac = self.create_mac_address() if need_change else (
-            self.mac_address[0] if self.mac_address else self.create_mac_address())
+        # 固定 MAC（策略 0 / 3）只生成一次；其余策略按 need_change 换新，否则沿用当前 MAC
+        if self._current_mac is None or (need_change and self.randomization not in (0, 3)):
+            self._use_mac(self.create_mac_address())
+        new_mac = self._current_mac
 
         # per_burst：每次发送前都置回 True；per_phase：由 change_phase 置 True
         self.force_mac_change = (self.mac_rotation_mode == 'per_burst')
 
-        if self.randomization in [0, 3]:
-            self.mac_address = [new_mac]
-        else:
-            self.mac_address.append(new_mac)
-
         vendor_for_probe = "Broadcom" if self.randomization == 1 else self.vendor
         mac, packets = create_probe(vendor_for_probe, self.randomization, self.SSID, num_pkt_burst,
                                     new_mac, inter_pkt_time, VHT_capabilities, extended_capabilities,
@@ -180,171 +367,267 @@ class Device:
         return packets
 
     def create_ssid(self):
-        ssid_chars = list("abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789")
-        num = np.random.randint(1, 11)
-        ssids = []
-        for _ in range(num):
-            ssid = "".join(np.random.choice(ssid_chars, size=32))
-            ssids.append(ssid)
-        return ssids
+        # 1~10 个 32 字符的 SSID，所有字符一次抽样；(num, 32) 的 uint8 直接视为 num 个 S32，不逐个建字符串
+        num = _RNG.integers(1, 11)
+        chars = _SSID_ALPHABET[_RNG.integers(0, len(_SSID_ALPHABET), size=(num, 32))]
+        return chars.view("S32").reshape(num)
 
     def change_phase(self, phase, time):
         self.phase = phase
         self.time_phase_changed = time
         # ★新增：每“相位”换 MAC 的策略触发
-        if getattr(self, 'mac_rotation_mode', 'per_burst') == 'per_phase':
+        if self.mac_rotation_mode == 'per_phase':
             self.force_mac_change = True
 
+    def attach_motion(self, table: MotionTable):
+        """把位置/速度/方向移交给 MotionTable 统一更新。"""
+        self._row = table.add(self._position, self._speed, self._direction)
+        self._motion = table
+
+    @property
+    def position(self):
+        if self._motion is None:
+            return self._position
+        self._motion.sync()
+        x, y = self._motion.positions[self._row]
+        return (float(x), float(y))
+
+    @position.setter
+    def position(self, value):
+        if self._motion is None:
+            self._position = value
+        else:
+            self._motion.sync()
+            self._motion.positions[self._row] = value
+
+    @property
+    def speed(self):
+        if self._motion is None:
+            return self._speed
+        return float(self._motion.speeds[self._row])
+
+    @speed.setter
+    def speed(self, value):
+        if self._motion is None:
+            self._speed = value
+        else:
+            self._motion.sync()
+            self._motion.speeds[self._row] = value
+
+    @property
+    def direction(self):
+        if self._motion is None:
+            return self._direction
+        self._motion.sync()
+        return float(self._motion.directions[self._row])
+
+    @direction.setter
+    def direction(self, value):
+        if self._motion is None:
+            self._direction = value
+        else:
+            self._motion.sync()
+            self._motion.directions[self._row] = value
+
     def update_position(self, delta_t):
-        # 简单直线运动更新位置，delta_t 为时间间隔（秒）
+        # 简单直线运动更新位置，delta_t 为时间间隔（秒）；已加入 MotionTable 时直接在表中推进本行
+        if self._motion is not None:
+            self._motion.step_rows([self._row], delta_t)
+            return
         dx = self.speed * delta_t * math.cos(math.radians(self.direction))
         dy = self.speed * delta_t * math.sin(math.radians(self.direction))
         x, y = self.position
         new_x = max(0, min(100, x + dx))
         new_y = max(0, min(100, y + dy))
         self.position = (new_x, new_y)
-        self.direction = (self.direction + random.uniform(-10, 10)) % 360
+        self.direction = (self.direction + _RNG.uniform(-10, 10)) % 360
 
     def print_information(self, file_name):
         with open(file_name + '.txt', 'a') as f:
             f.write(f"\nDevice {self.id} information:\nVendor: {self.vendor}\nModel: {self.model}\n"
-                    f"MAC Policy: {self.randomization}\nMAC address(es): {self.mac_address}\nSSID: {self.SSID}\n")
+                    f"MAC Policy: {self.randomization}\nMAC address (current): {self._current_mac}\n"
+                    f"SSID: {self.SSID.astype('U32').tolist()}\n")
 
     def print_statistics(self, file_name):
         with open(file_name + '.txt', 'a') as f:
-            f.write(f"Number of different MAC addresses: {len(self.mac_address)}\n"
+            f.write(f"Number of different MAC addresses: {self.mac_count}\n"
                     f"Number of packets sent: {self.number_packets_sent}\n"
                     f"Number of bursts sent: {self.number_bursts_sent}\n")
 
 
+def _parse_dist(field: str) -> dict:
+    """解析 "值:概率/值:概率/..." 形式的离散分布为 {值: 概率}。"""
+    return {float(k): float(v) for k, v in (x.split(":", 1) for x in field.strip().split("/"))}
+
+
+def _read_config_lines(path: str) -> list:
+    """一次读入配置文件，去掉空行与 # 注释行。"""
+    with open(path, "r") as f:
+        return [line for line in f.read().splitlines() if line.strip() and not line.startswith("#")]
+
+
+# 解析后的参数库缓存：与参数库一起记下两个配置文件的 (绝对路径, mtime_ns, size)，完全一致才直接 pickle.load，
+# 否则重新解析并回写。main 启动时 user_config 会重写 1.txt / 2.txt，所以命中只发生在配置文件不变的多次加载之间
+# （如 autotune 同一批候选、shiyan 的多次仿真）
+DEVICE_RATES_CACHE = "device_rates.pkl"
+
+
+def _config_sources(*paths):
+    sources = []
+    for path in paths:
+        st = os.stat(path)
+        sources.append((os.path.abspath(path), st.st_mtime_ns, st.st_size))
+    return tuple(sources)
+
+
 class DeviceRates:
-    def __init__(self):
-        self._database = {}
+    def __init__(self, path1="1.txt", path2="2.txt", cache_path=DEVICE_RATES_CACHE):
+        # (字段名, model, phase) -> 查询结果；参数库加载后只读，每个组合只需从数据库取一次
+        self._cache = {}
+        sources = _config_sources(path1, path2)
+        self._database = self._load_cached(sources, cache_path)
+        if self._database is None:
+            self._database = self._parse(path1, path2)
+            self._store_cache(sources, cache_path)
+
+    @staticmethod
+    def _load_cached(sources, cache_path):
+        """缓存记录的配置文件与 sources 完全一致时返回其中的参数库，否则（或缓存损坏）返回 None。"""
+        try:
+            with open(cache_path, "rb") as f:
+                cached = pickle.load(f)
+            if cached["sources"] == sources and isinstance(cached["database"], dict):
+                return cached["database"]
+        except Exception:
+            pass
+        return None
+
+    def _store_cache(self, sources, cache_path):
+        """先写本进程独占的临时文件再替换，避免并发进程读到写了一半的缓存；写不了（只读目录等）就跳过。"""
+        tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                pickle.dump({"sources": sources, "database": self._database}, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, cache_path)
+        except OSError:
+            pass
+
+    @staticmethod
+    def _parse(path1, path2):
+        database = {}
         # 设备参数库（1.txt）
-        with open("1.txt", "r") as f:
-            line = f.readline().replace("\\n", "")
-            while line:
-                if line.startswith("#"):
-                    line = f.readline().replace("\\n", "")
-                    continue
-                parts = line.strip().split(",")
-                vendor = parts[0].strip()
-                model = parts[1].strip()
-                burst_probs = parts[2].strip()
-                burst_length = {float(x.split(":")[0]): float(x.split(":")[1]) for x in burst_probs.split("/")}
-                randomization = int(parts[3].strip())
-                VHT_cap = parts[4].strip()
-                if VHT_cap == "?":
-                    VHT_cap = None
-                else:
-                    VHT_cap = bytes.fromhex(VHT_cap.replace("x", ""))
-                ext_cap = bytes.fromhex(parts[5].strip().replace("x", ""))
-                HT_cap = bytes.fromhex(parts[6].strip().replace("x", ""))
-                supported_rates = parts[7].strip()
-                ext_supported_rates = parts[8].strip()
-                key = model.replace(" ", "").lower()
-                self._database[key] = {
-                    "vendor": vendor,
-                    "model": model,
-                    "burst_lengths": burst_length,
-                    "randomization": randomization,
-                    "VHT_capabilities": VHT_cap,
-                    "extended_capabilities": ext_cap,
-                    "HT_capabilities": HT_cap,
-                    "supported_rates": supported_rates,
-                    "ext_supported_rates": ext_supported_rates
-                }
-                line = f.readline().replace("\\n", "")
+        for line in _read_config_lines(path1):
+            parts = line.strip().split(",")
+            vendor = parts[0].strip()
+            model = parts[1].strip()
+            burst_length = _parse_dist(parts[2])
+            randomization = int(parts[3].strip())
+            VHT_cap = parts[4].strip()
+            if VHT_cap == "?":
+                VHT_cap = None
+            else:
+                VHT_cap = bytes.fromhex(VHT_cap.replace("x", ""))
+            ext_cap = bytes.fromhex(parts[5].strip().replace("x", ""))
+            HT_cap = bytes.fromhex(parts[6].strip().replace("x", ""))
+            supported_rates = parts[7].strip()
+            ext_supported_rates = parts[8].strip()
+            key = model.replace(" ", "").lower()
+            database[key] = {
+                "vendor": vendor,
+                "model": model,
+                "burst_lengths": burst_length,
+                "randomization": randomization,
+                "VHT_capabilities": VHT_cap,
+                "extended_capabilities": ext_cap,
+                "HT_capabilities": HT_cap,
+                "supported_rates": supported_rates,
+                "ext_supported_rates": ext_supported_rates
+            }
 
         # 相位参数库（2.txt）
-        with open("2.txt", "r") as f2:
-            line = f2.readline().replace("\\n", "")
-            while line:
-                if line.startswith("#"):
-                    line = f2.readline().replace("\\n", "")
-                    continue
-                parts = line.strip().split(",")
-                model = parts[0].strip()
-                key = model.replace(" ", "").lower()
-                phase = int(parts[1].strip())
-                prob_int = {float(x.split(":")[0]): float(x.split(":")[1]) for x in parts[2].strip().split("/")}
-                prob_between = {float(x.split(":")[0]): float(x.split(":")[1]) for x in parts[3].strip().split("/")}
-                state_dwell = {float(x.split(":")[0]): float(x.split(":")[1]) for x in parts[4].strip().split("/")}
-                jitter = {float(x.split(":")[0]): float(x.split(":")[1]) for x in parts[5].strip().split("/")}
-
-                if "prob_int_burst" not in self._database[key]:
-                    self._database[key]["prob_int_burst"] = []
-                if "prob_between_bursts" not in self._database[key]:
-                    self._database[key]["prob_between_bursts"] = []
-                if "state_dwell" not in self._database[key]:
-                    self._database[key]["state_dwell"] = []
-                if "jitter" not in self._database[key]:
-                    self._database[key]["jitter"] = []
-
-                self._database[key]["prob_int_burst"].append((phase, prob_int))
-                self._database[key]["prob_between_bursts"].append((phase, prob_between))
-                self._database[key]["state_dwell"].append((phase, state_dwell))
-                self._database[key]["jitter"].append((phase, jitter))
-                line = f2.readline().replace("\\n", "")
+        for line in _read_config_lines(path2):
+            parts = line.strip().split(",")
+            model = parts[0].strip()
+            key = model.replace(" ", "").lower()
+            phase = int(parts[1].strip())
+            prob_int = _parse_dist(parts[2])
+            prob_between = _parse_dist(parts[3])
+            state_dwell = _parse_dist(parts[4])
+            jitter = _parse_dist(parts[5])
+
+            # 各相位字段按 {phase: 分布} 存放；同一型号同一相位重复出现时保留第一条
+            entry = database[key]
+            for name, dist in (("prob_int_burst", prob_int), ("prob_between_bursts", prob_between),
+                               ("state_dwell", state_dwell), ("jitter", jitter)):
+                entry.setdefault(name, {}).setdefault(phase, dist)
+        return database
 
     def get_element(self, model):
         return self._database[model.replace(" ", "").lower()]
 
+    def _lookup(self, name, model, phase=None):
+        """
+        带缓存的字段查询：phase 为 None 时取设备级字段，否则取该字段中对应相位的分布（找不到为 {}）。
+        """
+        key = (name, model, phase)
+        try:
+            return self._cache[key]
+        except KeyError:
+            pass
+        el = self.get_element(model)
+        if phase is None:
+            value = el[name]
+        else:
+            value = el.get(name, {}).get(phase, {})
+        self._cache[key] = value
+        return value
+
     def get_randomization(self, model):
-        return self.get_element(model)["randomization"]
+        return self._lookup("randomization", model)
 
     def get_burst_lengths(self, model):
-        return self.get_element(model)["burst_lengths"]
+        return self._lookup("burst_lengths", model)
 
     def get_supported_rates(self, model):
-        return self.get_element(model)["supported_rates"]
+        return self._lookup("supported_rates", model)
 
     def get_ext_supported_rates(self, model):
-        return self.get_element(model)["ext_supported_rates"]
+        return self._lookup("ext_supported_rates", model)
 
     def get_prob_int_burst(self, model, phase):
-        for ph, probs in self.get_element(model).get("prob_int_burst", []):
-            if ph == phase:
-                return probs
-        return {}
+        return self._lookup("prob_int_burst", model, phase)
 
     def get_prob_between_bursts(self, model, phase):
-        for ph, probs in self.get_element(model).get("prob_between_bursts", []):
-            if ph == phase:
-                return probs
-        return {}
+        return self._lookup("prob_between_bursts", model, phase)
 
     def get_state_dwell(self, model, phase):
-        for ph, dist in self.get_element(model).get("state_dwell", []):
-            if ph == phase:
-                return dist
-        return {}
+        return self._lookup("state_dwell", model, phase)
 
     def get_jitter(self, model, phase):
-        for ph, dist in self.get_element(model).get("jitter", []):
-            if ph == phase:
-                return dist
-        return {}
+        return self._lookup("jitter", model, phase)
 
     def get_VHT_capabilities(self, model):
-        return self.get_element(model)["VHT_capabilities"]
+        return self._lookup("VHT_capabilities", model)
 
     def get_extended_capabilities(self, model):
-        return self.get_element(model)["extended_capabilities"]
+        return self._lookup("extended_capabilities", model)
 
     def get_HT_capabilities(self, model):
-        return self.get_element(model)["HT_capabilities"]
+        return self._lookup("HT_capabilities", model)
 
     def is_sending_probe(self, model, phase):
+        key = ("is_sending_probe", model, phase)
+        try:
+            return self._cache[key]
+        except KeyError:
+            pass
         el = self.get_element(model)
-        if "prob_between_bursts" not in el:
-            return False
-        for ph, probs in el["prob_between_bursts"]:
-            if ph == phase:
-                return True
-        return False
+        sending = phase in el.get("prob_between_bursts", {})
+        self._cache[key] = sending
+        return sending
 
     def get_random_device(self):
-        key = random.choice(list(self._database.keys()))
+        keys = list(self._database.keys())
+        key = keys[_RNG.integers(len(keys))]
         device = self._database[key]
         return device["vendor"], device["model"], int(device["randomization"])